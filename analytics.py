@@ -0,0 +1,111 @@
+import math
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def minute_counts(timestamps):
+    # Arrivals per minute for a batch of log timestamps, parsed in one vectorized pass
+    stamps = pd.Series(list(timestamps), dtype=object).astype(str).str.strip()
+    parsed = pd.to_datetime(stamps, format=TIMESTAMP_FORMAT, errors="coerce")
+    counts = parsed.dropna().dt.floor("min").value_counts()
+    return Counter({moment.to_pydatetime(): int(count) for moment, count in counts.items()})
+
+
+def arrival_minute(timestamp):
+    try:
+        moment = datetime.strptime(str(timestamp).strip(), TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+    return moment.replace(second=0)
+
+
+def roster_arrivals(roster, index):
+    # How many registered attendees the duplicate index has seen, by name or email
+    return sum(index.seen(attendee.name, attendee.email) for attendee in roster.by_name.values())
+
+
+@dataclass
+class ArrivalReport:
+    per_minute: pd.Series
+    rolling_rate: pd.Series
+    current_rate: float
+    peak_start: datetime
+    peak_end: datetime
+    peak_arrivals: int
+    roster_total: int
+    roster_arrived: int
+    projection: pd.Series
+
+    @property
+    def roster_remaining(self):
+        return max(0, self.roster_total - self.roster_arrived)
+
+    @property
+    def remaining_share(self):
+        return self.roster_remaining / self.roster_total if self.roster_total else 0.0
+
+
+def analyze(per_minute, roster_total=0, roster_arrived=0, window=15, horizon=60, now=None):
+    """Turn per-minute arrival counts into the door-staffing view.
+
+    `per_minute` maps minute -> arrivals (CheckinStats keeps it incrementally), so
+    the work here is proportional to the event's length in minutes, not to the
+    log. The rolling rate is arrivals per minute over the trailing `window`
+    minutes. The projection assumes arrivals keep slowing in proportion to the
+    registered attendees still missing: at the current rate r with R missing,
+    R(t) = R * exp(-r t / R). It covers the next `horizon` minutes as projected
+    cumulative arrivals. Returns None for an empty log.
+    """
+    if not per_minute:
+        return None
+    series = pd.Series(per_minute, dtype="int64").sort_index()
+    first, last = series.index[0], series.index[-1]
+    if now is not None:
+        # Quiet minutes since the last arrival count toward the rate, up to the horizon
+        last = max(last, min(pd.Timestamp(now).floor("min"), last + pd.Timedelta(minutes=horizon)))
+    series = series.reindex(pd.date_range(first, last, freq="min"), fill_value=0)
+
+    rolling = series.rolling(window, min_periods=1).sum()
+    rate = rolling / np.minimum(np.arange(1, len(series) + 1), window)
+    peak_end = rolling.idxmax()
+    peak_start = max(first, peak_end - pd.Timedelta(minutes=window - 1))
+    current_rate = float(rate.iloc[-1])
+
+    missing = max(0, roster_total - roster_arrived)
+    steps = np.arange(1, horizon + 1)
+    if missing and current_rate > 0:
+        expected = missing * (1 - np.exp(-current_rate * steps / missing))
+    else:
+        expected = np.zeros(horizon)
+    arrived = int(series.sum())
+    projection = pd.Series(arrived + expected, index=pd.date_range(last + pd.Timedelta(minutes=1), periods=horizon,
+                                                                   freq="min"))
+    return ArrivalReport(per_minute=series, rolling_rate=rate, current_rate=current_rate,
+                         peak_start=peak_start.to_pydatetime(), peak_end=peak_end.to_pydatetime(),
+                         peak_arrivals=int(rolling.max()), roster_total=roster_total,
+                         roster_arrived=roster_arrived, projection=projection)
+
+
+def minutes_until(report, share):
+    # Projected minutes until `share` of the roster has arrived, or None if it won't at the current rate
+    target = report.roster_total * share - report.roster_arrived
+    if target <= 0:
+        return 0.0
+    missing = report.roster_remaining
+    if report.current_rate <= 0 or target >= missing:
+        return None
+    return -missing / report.current_rate * math.log(1 - target / missing)
+
+
+def bucket_counts(per_minute, bucket_minutes):
+    # Re-bin per-minute counts into coarser buckets (e.g. the 15-minute bar chart)
+    buckets = Counter()
+    for minute, count in per_minute.items():
+        buckets[minute - timedelta(minutes=minute.minute % bucket_minutes)] += count
+    return buckets
@@ -0,0 +1,107 @@
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime
+
+from checkin_state import DuplicateIndex
+
+CHECKED_IN = "Checked in"
+ALREADY_PRESENT = "Already present"
+NOT_FOUND = "Not found"
+
+
+@dataclass
+class BatchRow:
+    # One line of a pasted list or uploaded CSV, and what happened to it
+    line: int
+    query: str
+    # The line's name when `query` is its email, tried if the email finds nobody (e.g. a shared address)
+    fallback: str = ""
+    membership_status: str = ""
+    affiliation: str = ""
+    result: str = ""
+    name: str = ""
+    email: str = ""
+
+
+def _pick(*values):
+    # Prefer an email when a line carries both, since it is the more exact key; returns (query, fallback)
+    values = [v.strip() for v in values if v and v.strip()]
+    for value in values:
+        if "@" in value:
+            others = [v for v in values if v is not value]
+            return value, others[0] if others else ""
+    return (values[0] if values else ""), ""
+
+
+def parse_batch_text(text):
+    # One attendee per line: a name, an email, or "name, email"
+    rows = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        query, fallback = _pick(*line.replace("\t", ",").split(","))
+        if query:
+            rows.append(BatchRow(line=number, query=query, fallback=fallback))
+    return rows
+
+
+def parse_batch_csv(data):
+    """Read an uploaded CSV with a Name and/or Email column.
+
+    Optional "Membership Status" and "Affiliation" columns are carried onto the
+    log row; column names are matched case-insensitively.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    reader = csv.DictReader(io.StringIO(data))
+    columns = {c.strip().lower(): c for c in reader.fieldnames or []}
+    if "name" not in columns and "email" not in columns:
+        raise ValueError("The CSV needs a 'Name' or 'Email' column.")
+
+    def cell(row, column):
+        key = columns.get(column)
+        return (row.get(key) or "").strip() if key else ""
+
+    rows = []
+    for number, row in enumerate(reader, start=2):
+        query, fallback = _pick(cell(row, "email"), cell(row, "name"))
+        if query:
+            rows.append(BatchRow(line=number, query=query, fallback=fallback,
+                                 membership_status=cell(row, "membership status"),
+                                 affiliation=cell(row, "affiliation")))
+    return rows
+
+
+def checkin_batch(state, rows, roster, journal, columns, membership_status="", affiliation=""):
+    """Validate a whole batch against the roster and the log, then record it at once.
+
+    Runs under the snapshot lock (via TTLSnapshot.update), so the duplicate check
+    and the journal write can't interleave with single check-ins. Fills in each
+    row's result and returns the number of attendees checked in.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    in_batch = DuplicateIndex()
+    entries = []
+    for row in rows:
+        attendee = roster.find(row.query) or (roster.find(row.fallback) if row.fallback else None)
+        if attendee is None:
+            row.result = NOT_FOUND
+            continue
+        row.name, row.email = attendee.name, attendee.email
+        if state.index.seen(attendee.name, attendee.email) or in_batch.seen(attendee.name, attendee.email):
+            row.result = ALREADY_PRESENT
+            continue
+        in_batch.add(attendee.name, attendee.email)
+        row.result = CHECKED_IN
+        entries.append(dict(zip(columns, [
+            timestamp, attendee.name, attendee.email, attendee.credentials, "Preregistered",
+            row.membership_status or membership_status, "", row.affiliation or affiliation,
+        ])))
+    if entries:
+        journal.record_many(entries)
+        state.add_local(entries)
+    return len(entries)
+
+
+def batch_report(rows):
+    return [{"Line": row.line, "Input": row.query, "Result": row.result, "Name": row.name, "Email": row.email}
+            for row in rows]
@@ -0,0 +1,145 @@
+"""Times each stage of the check-in hot path on synthetic rosters and logs.
+
+Everything runs against a FakeSheetsBackend, so no Google credentials are needed.
+
+    python benchmark_checkin.py --sizes 100 10000 100000 --output bench.json
+
+Results are printed as a table and written as JSON: one record per size and stage
+with the median / min / max seconds over the repeats.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from exports import csv_bytes, excel_bytes
+from reconciliation import reconcile, roster_keys
+from roster import load_roster
+from roster_cache import load_compiled_roster, read_cache
+from roster_search import RosterSearch
+from storage import FakeSheetsBackend
+
+LOG_COLUMNS = ['Timestamp', 'Name', 'Email', 'Credentials', 'Status', 'Membership Status',
+               'Interested in Membership', 'Affiliation']
+
+
+def synthetic_people(count, rng):
+    def word():
+        return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))).title()
+    firsts = [word() for _ in range(max(50, count // 20))]
+    lasts = [word() for _ in range(max(50, count // 10))]
+    return [(f"{rng.choice(firsts)} {rng.choice(lasts)} {i}", f"person{i}@example.org") for i in range(count)]
+
+
+def write_roster(path, people, rng):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Name", "Email", "Credentials", "Membership Note"])
+        for name, email in people:
+            writer.writerow([name, email, rng.choice(["", "RN", "BSN, RN", "NP"]), ""])
+
+
+def synthetic_log(people, rng):
+    start = datetime(2025, 5, 17, 7, 30)
+    rows = [LOG_COLUMNS]
+    for i, (name, email) in enumerate(people):
+        member = rng.choice(["Yes", "No"])
+        rows.append([(start + timedelta(seconds=i * 2)).strftime("%Y-%m-%d %H:%M:%S"), name, email, "RN",
+                     rng.choice(["Preregistered", "Manual"]), member,
+                     rng.choice(["Yes", "No"]) if member == "No" else "", ""])
+    return rows
+
+
+def timed(fn, repeats):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return samples, result
+
+
+def bench_size(size, repeats, rng, directory, with_excel):
+    people = synthetic_people(size, rng)
+    roster_path = os.path.join(directory, f"roster_{size}.csv")
+    write_roster(roster_path, people, rng)
+    # Half of the roster has already checked in
+    backend = FakeSheetsBackend(LOG_COLUMNS, rows=synthetic_log(people[:size // 2], rng))
+    probes = [rng.choice(people) for _ in range(200)]
+    results = {}
+
+    results["roster_load"], roster = timed(lambda: load_roster(roster_path), repeats)
+    results["search_index_build"], search = timed(lambda: RosterSearch(roster.by_name.values()), repeats)
+    results["roster_compile"], _ = timed(lambda: load_compiled_roster(roster_path, rebuild=True), repeats)
+    results["roster_cache_load"], _ = timed(lambda: read_cache(roster_path), repeats)
+    results["selectbox_options"], _ = timed(
+        lambda: [[""] + [a.name for a in search.search(name.split()[0][:4], limit=10)] for name, _ in probes[:20]],
+        repeats)
+    results["attendee_resolution"], _ = timed(lambda: [roster.by_name[name] for name, _ in probes], repeats)
+    results["log_load"], state = timed(lambda: backend.load_log(), repeats)
+    results["duplicate_check"], _ = timed(lambda: [state.index.seen(name, email) for name, email in probes], repeats)
+
+    newcomers = iter(people[size // 2:] + [(f"Walk In {i}", f"walkin{i}@example.org") for i in range(repeats * 2)])
+
+    def append_one():
+        name, email = next(newcomers)
+        entry = dict(zip(LOG_COLUMNS, [datetime.now().strftime("%Y-%m-%d %H:%M:%S"), name, email, "", "Manual",
+                                       "Yes", "", ""]))
+        state.append(entry)
+        return backend.write([entry])
+
+    results["append_write"], _ = timed(append_one, repeats)
+    results["export_csv"], _ = timed(lambda: csv_bytes(state.frame), repeats)
+    results["roster_keys"], keys = timed(lambda: roster_keys(roster), repeats)
+    results["reconcile"], _ = timed(lambda: reconcile(keys, state.frame), repeats)
+    if with_excel:
+        results["export_excel"], _ = timed(lambda: excel_bytes(state.frame), max(1, repeats // 2))
+
+    return [
+        {"size": size, "stage": stage, "repeats": len(samples), "median_s": statistics.median(samples),
+         "min_s": min(samples), "max_s": max(samples)}
+        for stage, samples in results.items()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--skip-excel", action="store_true", help="leave out the (slow) xlsx export stage")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            records.extend(bench_size(size, args.repeats, rng, directory, not args.skip_excel))
+
+    for record in records:
+        print(f"{record['size']:>7} {record['stage']:<22} {record['median_s'] * 1000:>10.2f} ms", file=sys.stderr)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": records,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measures cold-start time of the check-in app: landing page and first attendee view.
+
+Each sample starts a fresh interpreter and drives the app with Streamlit's AppTest
+against the in-memory fake backend, so no Google credentials are needed.
+
+    python benchmark_startup.py --repeats 5
+    python benchmark_startup.py --script old_app.py --output startup.json
+
+Reported per script: seconds until the landing page has rendered, and until the
+attendee view (roster, log snapshot) has rendered after clicking through.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCRIPT = os.path.join(HERE, "checkin_app_google_sheets.py")
+
+
+def child(script):
+    # One cold start; runs in a scratch directory so journals and logs are thrown away
+    sys.path.insert(0, HERE)
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+    at = AppTest.from_file(script, default_timeout=120)
+    at.run()
+    landing = time.perf_counter()
+    at.button[0].click().run()
+    attendee = time.perf_counter()
+    if at.exception:
+        raise SystemExit(f"app raised: {at.exception}")
+    print(json.dumps({"landing_s": landing - imported, "attendee_s": attendee - imported,
+                      "apptest_import_s": imported - started}))
+
+
+def sample(script):
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(os.path.join(HERE, "registration_list.csv"), directory)
+        env = dict(os.environ, CHECKIN_STORAGE="fake", PYTHONDONTWRITEBYTECODE="1")
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", os.path.abspath(script)],
+                             cwd=directory, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", nargs="+", default=[DEFAULT_SCRIPT], help="app script(s) to compare")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    records = []
+    for script in args.script:
+        samples = [sample(script) for _ in range(args.repeats)]
+        for stage in ("landing_s", "attendee_s"):
+            values = [s[stage] for s in samples]
+            records.append({"script": os.path.basename(script), "stage": stage[:-2], "repeats": len(values),
+                            "median_s": statistics.median(values), "min_s": min(values), "max_s": max(values)})
+
+    for record in records:
+        print(f"{record['script']:<32} {record['stage']:<10} {record['median_s'] * 1000:>10.1f} ms", file=sys.stderr)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": records,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,243 @@
 import streamlit as st
-import pandas as pd
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import gspread
-from gspread_dataframe import set_with_dataframe
 import json
-from google.oauth2.service_account import Credentials
+from checkin_journal import CONFIRMED, REJECTED, RETRYING, CheckinJournal, JournalFlusher
+from events import Event, EventPool, event_path, load_events
+from instrumentation import Metrics, start_metrics_server
+from sheets_cache import CacheStats, TTLSnapshot
+from sheets_scheduler import SheetsScheduler
+# pandas, gspread and the modules built on them are imported below the landing page (and warmed up on a worker thread)
 
 
-# Organizer login password
+# Organizer login password (an event can set its own)
 ORGANIZER_PASSWORD = "pnany2025"
 
+# Events served by this deployment, as a JSON list (see events.example.json); without the file, just DEFAULT_EVENT
+EVENTS_PATH = os.environ.get("CHECKIN_EVENTS", "events.json")
+DEFAULT_EVENT = Event(key="pnany-2025-spring", title="PNANY 2025 Spring Educational Conference",
+                      sheet_name="PNANY 2025 Check-In Log", registration_file="registration_list.csv")
+
+# An event's connection, log snapshot, roster indexes and flusher are released after this long without
+# a rerun, and beyond this many open events the least recently used one goes first
+EVENT_IDLE_SECONDS = 30 * 60
+MAX_ACTIVE_EVENTS = 4
+
+# Check-ins arriving within this many seconds of each other share one append_rows call
+CHECKIN_WRITE_WINDOW = 0.25
+
+# Local write-ahead journal; check-ins are durable here before they reach the sheet
+JOURNAL_PATH = "checkin_journal.sqlite3"
+
+# How often the attendee screen re-checks whether its check-ins have reached the sheet
+WRITE_STATUS_POLL_SECONDS = 2
+
+# Number of attendee matches offered for a search query
+SEARCH_RESULTS_LIMIT = 10
+
+# Rows per page in the organizer log viewer
+LOG_PAGE_SIZE = 50
+
+# The live dashboard re-reads the shared log snapshot this often (the snapshot itself refreshes at most every LOG_SNAPSHOT_TTL)
+LIVE_DASHBOARD_POLL_SECONDS = 5
+LIVE_DASHBOARD_RECENT_ROWS = 10
+
+# Arrival analytics: trailing window for the arrival rate and how far ahead to project, in minutes
+ARRIVAL_RATE_WINDOW = 15
+ARRIVAL_PROJECTION_MINUTES = 60
+
+# The shared log snapshot is reused for this many seconds, then only new sheet rows are fetched
+LOG_SNAPSHOT_TTL = 10
+
+# Where the check-in log is stored: "sheets" (Google Sheets), "sqlite" (local file) or "fake" (in-memory, for load tests)
+STORAGE_BACKEND = os.environ.get("CHECKIN_STORAGE", "sheets")
+SQLITE_PATH = "checkin_log.sqlite3"
+FAKE_SHEETS_LATENCY = 0.2
+
+# Offline mode: the last log seen from the sheet is mirrored here, and is what duplicates are checked
+# against (with the journal) while the sheet can't be reached; reconnecting is retried this often
+LOG_MIRROR_PATH = "checkin_mirror.sqlite3"
+OFFLINE_RETRY_SECONDS = 30
+SHEETS_TIMEOUT_SECONDS = 10
+
+# This process's share of the service account's Sheets quota (Google allows 60 reads and 60 writes per minute per
+# user); split evenly among the events that can be open at once on the same account, unless an event sets its own
+SHEETS_READS_PER_MINUTE = 60
+SHEETS_WRITES_PER_MINUTE = 60
+
+# Set to serve Prometheus-style metrics at http://<host>:<port>/metrics
+METRICS_PORT = os.environ.get("CHECKIN_METRICS_PORT")
+
 # Setup
 st.set_page_config(page_title='Event Check-In', layout='centered')
-sheet_name = 'PNANY 2025 Check-In Log'
-creds_dict = st.secrets['GOOGLE_CREDENTIALS']
 scopes = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
-credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-gc = gspread.authorize(credentials)
-worksheet = gc.open(sheet_name).sheet1
-existing_data = worksheet.get_all_records()
-checkin_log = pd.DataFrame(existing_data)
 log_columns = ['Timestamp', 'Name', 'Email', 'Credentials', 'Status', 'Membership Status', 'Interested in Membership', 'Affiliation']
-for col in log_columns:
-    if col not in checkin_log.columns:
-        checkin_log[col] = ''
+
+
+@st.cache_resource
+def get_backend_stats():
+    return CacheStats()
+
+
+@st.cache_resource
+def get_metrics():
+    metrics = Metrics()
+    if METRICS_PORT:
+        start_metrics_server(metrics, int(METRICS_PORT))
+    return metrics
+
+
+@st.cache_resource(max_entries=1)
+def get_events(path, mtime):
+    return load_events(path, DEFAULT_EVENT)
+
+
+@st.cache_resource
+def get_event_pool():
+    return EventPool(EVENT_IDLE_SECONDS, MAX_ACTIVE_EVENTS)
+
+
+@st.cache_resource
+def get_scheduler(event_key):
+    event = events[event_key]
+    # Events on one service account draw from the same per-user quota, and at most MAX_ACTIVE_EVENTS are open
+    sharing = sum(other.credentials_secret == event.credentials_secret for other in events.values())
+    share = min(sharing, MAX_ACTIVE_EVENTS)
+    return SheetsScheduler(event.reads_per_minute or SHEETS_READS_PER_MINUTE // share,
+                           event.writes_per_minute or SHEETS_WRITES_PER_MINUTE // share, metrics=get_metrics())
+
+
+def open_backend(kind, event, metrics, scheduler):
+    # Runs on the warm-up thread, so the heavy imports happen here rather than at the top of the script
+    with metrics.span("startup.imports"):
+        import pandas  # noqa: F401
+        from storage import FailoverBackend, FakeSheetsBackend, LogMirror, SheetsBackend, SQLiteBackend
+    if kind == "sqlite":
+        return SQLiteBackend(event_path(SQLITE_PATH, event, DEFAULT_EVENT), log_columns).instrument(metrics)
+    creds_dict = st.secrets[event.credentials_secret] if kind == "sheets" else None
+
+    def connect():
+        # Also called later from the flusher thread to reconnect after an outage
+        if kind == "fake":
+            return FakeSheetsBackend(log_columns, latency=FAKE_SHEETS_LATENCY, scheduler=scheduler)
+        with metrics.span("sheets.auth"):
+            import gspread
+            from google.oauth2.service_account import Credentials
+            credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+            gc = gspread.authorize(credentials)
+            gc.set_timeout(SHEETS_TIMEOUT_SECONDS)
+            return SheetsBackend(gc.open(event.sheet_name).sheet1, log_columns, scheduler=scheduler)
+
+    backend = FailoverBackend(connect, LogMirror(event_path(LOG_MIRROR_PATH, event, DEFAULT_EVENT), log_columns),
+                              retry_interval=OFFLINE_RETRY_SECONDS).instrument(metrics)
+    backend.connect()
+    return backend
+
+
+@st.cache_resource
+def start_backend(kind, event_key):
+    # Started from the landing page; the first view that needs the log waits on the returned future
+    get_backend_stats().misses += 1
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkin-warmup")
+    future = executor.submit(open_backend, kind, events[event_key], get_metrics(), get_scheduler(event_key))
+    executor.shutdown(wait=False)
+    return future
+
+
+def connect_backend(kind, event_key):
+    future = get_backend_stats().lookup(start_backend, kind, event_key)
+    try:
+        return future.result()
+    except Exception:
+        # Let the next rerun try to connect again instead of caching the failure
+        start_backend.clear(kind, event_key)
+        raise
+
+
+@st.cache_resource(on_release=lambda journal: journal.close())
+def get_checkin_journal(path):
+    return CheckinJournal(path)
+
+
+@st.cache_resource
+def get_log_snapshot(event_key, _backend, _journal):
+    metrics = get_metrics()
+
+    def load():
+        with metrics.span("log.load"):
+            return _backend.load_log(_journal)
+
+    def refresh(state):
+        with metrics.span("log.refresh"):
+            return _backend.refresh_log(state, _journal)
+
+    return TTLSnapshot(load, ttl=LOG_SNAPSHOT_TTL, refresh=refresh)
+
+
+# Released flushers only exit once idle, and an event with check-ins still queued is never released
+@st.cache_resource(on_release=lambda flusher: flusher.stop(timeout=0))
+def get_journal_flusher(event_key, _journal, _backend):
+    return JournalFlusher(_journal, _backend, window=CHECKIN_WRITE_WINDOW, metrics=get_metrics()).start()
+
+
+@st.cache_resource
+def get_export_cache(event_key):
+    return ExportCache()
+
+
+@st.cache_resource(max_entries=MAX_ACTIVE_EVENTS)
+def get_compiled_roster(path, mtime):
+    # Validated roster, lookup keys, search index and reconciliation keys, from the pickle cache beside the CSV
+    with get_metrics().span("roster.load"):
+        return load_compiled_roster(path)
+
+
+def event_busy(event_key):
+    # Check-ins still waiting for the sheet keep their event's flusher and connection open
+    if event_key not in events:
+        return False
+    journal_path = event_path(JOURNAL_PATH, events[event_key], DEFAULT_EVENT)
+    return os.path.exists(journal_path) and get_checkin_journal(journal_path).pending_count() > 0
+
+
+def release_event(event_key):
+    # Drops every process-wide resource of an idle event; the next rerun for it reopens them
+    get_journal_flusher.clear(event_key, None, None)
+    get_log_snapshot.clear(event_key, None, None)
+    get_export_cache.clear(event_key)
+    start_backend.clear(STORAGE_BACKEND, event_key)
+    get_scheduler.clear(event_key)
+    released = events.get(event_key)
+    if released is not None:
+        get_checkin_journal.clear(event_path(JOURNAL_PATH, released, DEFAULT_EVENT))
+        if os.path.exists(released.registration_file):
+            mtime = os.path.getmtime(released.registration_file)
+            get_compiled_roster.clear(released.registration_file, mtime)
+    metrics.count("events.released")
+
+
+rerun_started = time.perf_counter()
+metrics = get_metrics()
+events = get_events(EVENTS_PATH, os.path.getmtime(EVENTS_PATH) if os.path.exists(EVENTS_PATH) else 0)
+
+# Kiosks are pointed at an event with ?event=<key>; otherwise the session keeps the one picked on the landing page
+event_key = st.query_params.get("event")
+if event_key not in events:
+    event_key = st.session_state.get("event_key") if st.session_state.get("event_key") in events else next(iter(events))
+if st.session_state.get("event_key") not in (None, event_key):
+    # Nothing seen or unlocked for another event carries over, including the organizer login
+    for state_key in ("view", "organizer_logged_in", "submitted_checkins", "log_view", "live_previous",
+                      "roster_arrived", "reconciliation"):
+        st.session_state.pop(state_key, None)
+st.session_state.event_key = event_key
+event = events[event_key]
+event_pool = get_event_pool()
+event_pool.touch(event.key)
+event_pool.evict(release_event, busy=event_busy)
+start_backend(STORAGE_BACKEND, event.key)
 
 # Background image
 background_image = '''
@@ -42,6 +254,13 @@ st.markdown(background_image, unsafe_allow_html=True)
 # PNANY Logo
 st.image("https://i.imgur.com/QjLFALD.png", width=180)
 
+if len(events) > 1 and st.session_state.get("view") is None:
+    picked_event = st.selectbox("Event", list(events), index=list(events).index(event.key),
+                                format_func=lambda key: events[key].title)
+    if picked_event != event.key:
+        st.query_params["event"] = picked_event
+        st.rerun()
+
 ## Landing Page Navigation
 if "view" not in st.session_state:
     st.session_state.view = None
@@ -79,29 +298,75 @@ with col2:
 #
 
 if st.session_state.view is None:
+    metrics.observe("rerun.landing", time.perf_counter() - rerun_started)
     st.stop()
 
 ###
 
+import pandas as pd
+from analytics import analyze, minutes_until, roster_arrivals
+from batch_checkin import CHECKED_IN, batch_report, checkin_batch, parse_batch_csv, parse_batch_text
+from checkin_state import record_checkin
+from exports import ExportCache, csv_bytes, excel_bytes
+from log_view import LogFilter, filter_positions, page_count, page_of
+from reconciliation import reconcile
+from roster import ERROR, FIXED, WARNING
+from roster_cache import cache_path, load_compiled_roster, problem_counts
+
+with metrics.span("rerun.connect"):
+    backend = connect_backend(STORAGE_BACKEND, event.key)
+    checkin_journal = get_checkin_journal(event_path(JOURNAL_PATH, event, DEFAULT_EVENT))
+    journal_flusher = get_journal_flusher(event.key, checkin_journal, backend)
+    log_snapshot = get_log_snapshot(event.key, backend, checkin_journal)
+with metrics.span("rerun.log_snapshot"):
+    log_state = log_snapshot.get()
+log_version = log_state.version
+export_cache = get_export_cache(event.key)
+
+if not backend.online:
+    st.warning(f"📴 Offline: check-ins are saved on this device ({journal_flusher.queue_depth()} waiting) and will be "
+               f"sent to the sheet when the connection returns. Duplicates are checked against the last copy of the log.")
+
 # Load pre-uploaded registration list
-registration_file = "registration_list.csv"
+registration_file = event.registration_file
+
 
 if os.path.exists(registration_file):
-    registration_list = pd.read_csv(registration_file)
-    registration_list["Name"] = registration_list["Name"].astype(str).str.strip()
-    registration_list["Email"] = registration_list["Email"].astype(str).str.strip()
-    registration_list["Credentials"] = registration_list["Credentials"].fillna("").astype(str).str.strip()
-    if "Membership Note" not in registration_list.columns:
-        registration_list["Membership Note"] = ""
+    with metrics.span("rerun.roster"):
+        registration_mtime = os.path.getmtime(registration_file)
+        try:
+            compiled_roster = get_compiled_roster(registration_file, registration_mtime)
+        except ValueError as exc:
+            st.error(f"❌ {exc}")
+            st.stop()
+        roster = compiled_roster.roster
+        roster_search = compiled_roster.search
 else:
-    st.error("❌ 'registration_list.csv' not found. Please upload the file to the app directory.")
+    st.error(f"❌ '{registration_file}' not found. Please upload the file to the app directory.")
     st.stop()
 
 
 
+def arrival_report(state):
+    # Matching the roster against the log is O(roster), so it is redone only when the log changes
+    cached = st.session_state.get("roster_arrived")
+    if cached is None or cached[0] != (state.version, roster.mtime):
+        cached = st.session_state.roster_arrived = ((state.version, roster.mtime), roster_arrivals(roster, state.index))
+    return analyze(state.stats.per_minute, roster_total=len(roster), roster_arrived=cached[1],
+                   window=ARRIVAL_RATE_WINDOW, horizon=ARRIVAL_PROJECTION_MINUTES, now=datetime.now())
+
+
+def reconciliation_report(state):
+    cached = st.session_state.get("reconciliation")
+    if cached is None or cached[0] != (state.version, roster.mtime):
+        result = reconcile(compiled_roster.keys, state.frame)
+        cached = st.session_state.reconciliation = ((state.version, roster.mtime), result)
+    return cached[1]
+
+
 # -------------------- ATTENDEE VIEW --------------------
 if st.session_state.view == "attendee":
-    st.markdown("<h2 style='text-align: center; color: navy;'>👋 Welcome to PNANY 2025 Spring Educational Conference</h2>", unsafe_allow_html=True)
+    st.markdown(f"<h2 style='text-align: center; color: navy;'>👋 Welcome to {event.title}</h2>", unsafe_allow_html=True)
 
     tab1, tab2 = st.tabs([
         "🧾 Pre-Registered Check-In",
@@ -110,7 +375,7 @@ if st.session_state.view == "attendee":
 
     with tab1:
         st.header("🧾 Pre-Registered Attendee Check-In")
-        if registration_list.empty:
+        if not roster:
             st.warning("⚠️ Please upload a registration list to begin.")
         else:
             # with st.form("pre_registered_form"):
@@ -156,27 +421,34 @@ if st.session_state.view == "attendee":
                 
             #     submitted = st.form_submit_button("✅ Check In")
 
+            # The search box sits outside the form so results refresh as the attendee types
+            query = st.text_input("🔎 Search your name or email")
+            with metrics.span("rerun.search"):
+                matches = roster_search.search(query, limit=SEARCH_RESULTS_LIMIT)
+            if query and not matches:
+                st.info("No matching registration found. Check the spelling or use Manual Check-In.")
+
             with st.form("pre_registered_form"):
-                attendee_name = st.selectbox("Select your name", options=[""] + sorted(registration_list["Name"].unique()))
+                attendee_name = st.selectbox("Select your name", options=[""] + [a.name for a in matches])
                 credentials = ""
                 email = ""
                 missing_cred = False
                 note = ""
                 
                 if attendee_name:
-                    attendee = registration_list[registration_list["Name"] == attendee_name].iloc[0]
-                    email = attendee["Email"]
-                    existing_cred = attendee["Credentials"]
-                    note = attendee.get("Membership Note", "")
+                    attendee = roster.by_name[attendee_name]
+                    email = attendee.email
+                    existing_cred = attendee.credentials
+                    note = attendee.membership_note
             
-                    if not isinstance(existing_cred, str) or existing_cred.strip().lower() in ["", "nan", "none"]:
+                    if existing_cred.lower() in ["", "nan", "none"]:
                         credentials = st.text_input("✍️ Enter your credentials")
                         missing_cred = True
                     else:
                         credentials = existing_cred
                         st.markdown(f"**Pre-registered credentials:** `{credentials}`")
             
-                membership_status = st.radio("Are you a PNANY member?", ["Yes", "No"], horizontal=True)
+                membership_status = st.radio(f"Are you a {event.organization} member?", ["Yes", "No"], horizontal=True)
                 interested = ""
                 if membership_status == "No":
                     interested = st.radio("Would you like to become a member?", ["Yes", "No"], horizontal=True)
@@ -204,21 +476,20 @@ if st.session_state.view == "attendee":
                 if missing_cred and not credentials.strip():
                     st.warning("⚠️ Credentials are required for check-in.")
                 elif attendee_name:
-                    name_lower = attendee_name.lower()
-                    email_lower = email.lower()
-                    log_names = checkin_log["Name"].astype(str).str.lower()
-                    log_emails = checkin_log["Email"].astype(str).str.lower()
-
-                    if name_lower in log_names.values or email_lower in log_emails.values:
+                    with metrics.span("submit.build_entry"):
+                        entry = dict(zip(log_columns, [datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                       attendee_name, email, credentials, "Preregistered",
+                                                       membership_status,
+                                                       interested if membership_status == "No" else "",
+                                                       ""]))
+                    with metrics.span("submit.record"):
+                        recorded = log_snapshot.update(lambda state: record_checkin(state, entry, checkin_journal))
+                    metrics.count("submit.duplicates" if not recorded else "submit.checkins")
+                    if not recorded:
                         st.warning(f"🚫 {attendee_name} has already checked in.")
                     else:
-                        new_entry = pd.DataFrame([[datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                                   attendee_name, email, credentials, "Preregistered",
-                                                   membership_status,
-                                                   interested if membership_status == "No" else "",
-                                                   ""]], columns=log_columns)
-                        checkin_log = pd.concat([checkin_log, new_entry], ignore_index=True)
-                        set_with_dataframe(worksheet, checkin_log)
+                        journal_flusher.notify()
+                        st.session_state.setdefault("submitted_checkins", []).append((recorded, attendee_name))
                         st.success(f"🎉 {attendee_name} has been checked in.")
 
     with tab2:
@@ -226,7 +497,7 @@ if st.session_state.view == "attendee":
         name_input = st.text_input("Full Name")
         email_input = st.text_input("Email")
         credentials_input = st.text_input("Credentials (optional)")
-        membership_status = st.radio("Are you a PNANY member?", ["Yes", "No"], horizontal=True)
+        membership_status = st.radio(f"Are you a {event.organization} member?", ["Yes", "No"], horizontal=True)
         interested = ""
         if membership_status == "No":
             interested = st.radio("Would you like to become a member?", ["Yes", "No"], horizontal=True)
@@ -238,23 +509,47 @@ if st.session_state.view == "attendee":
             elif not re.match(r"[^@]+@[^@]+\.[^@]+", email_input):
                 st.error("❌ Please enter a valid email address.")
             else:
-                name_lower = name_input.lower()
-                email_lower = email_input.lower()
-                log_names = checkin_log["Name"].astype(str).str.lower()
-                log_emails = checkin_log["Email"].astype(str).str.lower()
-
-                if name_lower in log_names.values or email_lower in log_emails.values:
+                with metrics.span("submit.build_entry"):
+                    entry = dict(zip(log_columns, [datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                   name_input, email_input, credentials_input, "Manual",
+                                                   membership_status,
+                                                   interested if membership_status == "No" else "",
+                                                   affiliation]))
+                with metrics.span("submit.record"):
+                    recorded = log_snapshot.update(lambda state: record_checkin(state, entry, checkin_journal))
+                metrics.count("submit.duplicates" if not recorded else "submit.checkins")
+                if not recorded:
                     st.warning(f"🚫 {name_input} has already checked in.")
                 else:
-                    new_entry = pd.DataFrame([[datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                               name_input, email_input, credentials_input, "Manual",
-                                               membership_status,
-                                               interested if membership_status == "No" else "",
-                                               affiliation]], columns=log_columns)
-                    checkin_log = pd.concat([checkin_log, new_entry], ignore_index=True)
-                    set_with_dataframe(worksheet, checkin_log)
+                    journal_flusher.notify()
+                    st.session_state.setdefault("submitted_checkins", []).append((recorded, name_input))
                     st.success(f"✅ {name_input} has been manually checked in.")
 
+    # Submits return as soon as the journal has the entry; this follows each one until it is in the sheet
+    @st.fragment(run_every=WRITE_STATUS_POLL_SECONDS)
+    def show_write_status():
+        # A kiosk that only polls here is still in use. Its journal is looked up again in case another
+        # event's rerun released this one (closing the journal) since the last full rerun
+        event_pool.touch(event.key)
+        submitted = st.session_state.get("submitted_checkins", [])[-5:]
+        if not submitted:
+            return
+        journal = get_checkin_journal(event_path(JOURNAL_PATH, event, DEFAULT_EVENT))
+        statuses = journal.statuses([journal_id for journal_id, _ in submitted])
+        for journal_id, name in reversed(submitted):
+            status = statuses.get(journal_id)
+            if status == CONFIRMED:
+                st.caption(f"✅ {name}: saved to the check-in sheet")
+            elif status == REJECTED:
+                st.caption(f"🚫 {name}: not saved, the check-in sheet already has this name or email. "
+                           f"Please see an organizer.")
+            elif status == RETRYING:
+                st.caption(f"🔁 {name}: saved on this device, retrying the sheet")
+            else:
+                st.caption(f"⏳ {name}: saved on this device, sending to the sheet…")
+
+    show_write_status()
+
 # -------------------- ORGANIZER VIEW --------------------
 # elif st.session_state.view == "organizer":
 #     st.markdown("<h2 style='text-align: center; color: navy;'>🛠 Organizer View</h2>", unsafe_allow_html=True)
@@ -284,10 +579,10 @@ elif st.session_state.view == "organizer":
         login_attempt = st.button("🔓 Login")
 
         if login_attempt:
-            if password == ORGANIZER_PASSWORD:
+            if password == (event.organizer_password or ORGANIZER_PASSWORD):
                 st.success("✅ Login successful! Redirecting...")
                 st.session_state.organizer_logged_in = True
-                st.experimental_rerun()  # Only rerun right after setting the flag
+                st.rerun()  # Only rerun right after setting the flag
             else:
                 st.error("❌ Incorrect password.")
 
@@ -296,51 +591,296 @@ elif st.session_state.view == "organizer":
 ##    
     # Once logged in, show full Organizer View
     st.markdown("<h2 style='text-align: center; color: navy;'>🛠 Organizer View</h2>", unsafe_allow_html=True)
-    tab3, tab4 = st.tabs(["📄 View Check-In Log", "🌟 Interested in Membership"])
+
+    if st.toggle("📺 Live dashboard", key="live_dashboard", help="For a wall display: updates itself in place"):
+        # Each poll reruns only this fragment: no login, CSS or export work, and the shared snapshot
+        # makes at most one incremental sheet read per LOG_SNAPSHOT_TTL for all open dashboards
+        @st.fragment(run_every=LIVE_DASHBOARD_POLL_SECONDS)
+        def live_dashboard():
+            # Like show_write_status: keeps the event open, and reopens it if it was released meanwhile
+            event_pool.touch(event.key)
+            with metrics.span("live.poll"):
+                journal = get_checkin_journal(event_path(JOURNAL_PATH, event, DEFAULT_EVENT))
+                state = get_log_snapshot(event.key, connect_backend(STORAGE_BACKEND, event.key), journal).get()
+            stats = state.stats
+            previous = st.session_state.get("live_previous")
+            if previous is None or previous["version"] != state.version:
+                # The log changed: rebuild the recent-arrivals rows from the tail of the store only
+                log = state.log
+                newest = range(len(log) - 1, max(-1, len(log) - 1 - LIVE_DASHBOARD_RECENT_ROWS), -1)
+                recent = [log.row(i) for i in newest]
+                st.session_state.live_previous = {
+                    "version": state.version, "recent": recent, "changed_at": datetime.now(),
+                    "totals": previous["current"] if previous else None,
+                    "current": (stats.total, stats.by_status["Preregistered"], stats.by_status["Manual"],
+                                stats.members, len(stats.interested)),
+                }
+            live = st.session_state.live_previous
+            deltas = live["totals"] or live["current"]
+            cols = st.columns(5)
+            labels = ("Checked in", "Preregistered", "Manual", "Members", "Interested")
+            for col, label, value, before in zip(cols, labels, live["current"], deltas):
+                col.metric(label, value, delta=value - before or None)
+            if stats.per_bucket:
+                st.bar_chart(pd.Series(stats.per_bucket, name="Check-ins").sort_index(), height=220)
+            report = arrival_report(state)
+            if report is not None:
+                st.caption(f"Arriving at {report.current_rate:.1f}/min over the last {ARRIVAL_RATE_WINDOW} min · "
+                           f"{report.roster_remaining} registered ({report.remaining_share:.0%}) still to arrive")
+            st.caption(f"Latest arrivals · last change {live['changed_at'].strftime('%H:%M:%S')} · "
+                       f"checked {datetime.now().strftime('%H:%M:%S')}")
+            if live["recent"]:
+                recent = pd.DataFrame(live["recent"], columns=state.log.columns)
+                st.dataframe(recent[["Timestamp", "Name", "Status", "Affiliation"]], hide_index=True)
+
+        live_dashboard()
+        st.stop()
+
+    if st.button("🔄 Refresh now"):
+        log_state = log_snapshot.refresh()
+        log_version = log_state.version
+    # Only the organizer tabs need a DataFrame; the log store caches it until the next append
+    checkin_log = log_state.frame
+    tab3, tab4, tab7, tab8, tab6, tab9, tab5 = st.tabs(["📄 View Check-In Log", "🌟 Interested in Membership",
+                                                        "📈 Arrivals", "🧮 Reconciliation", "👥 Batch Check-In",
+                                                        "📋 Registration List", "⏱ Performance"])
     
 ##    
     
     with tab3:
         st.header("📄 Checked-In Attendees Log")
-        total_checked_in = len(checkin_log)
-        st.subheader(f"✅ Total Checked-In: {total_checked_in}")
+        checkin_stats = log_state.stats
+        st.subheader(f"✅ Total Checked-In: {checkin_stats.total}")
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Preregistered", checkin_stats.by_status["Preregistered"])
+        col2.metric("Manual", checkin_stats.by_status["Manual"])
+        col3.metric("Members", checkin_stats.members)
+        col4.metric("Non-members", checkin_stats.non_members)
+        col5.metric("Interested", len(checkin_stats.interested))
+        if checkin_stats.per_bucket:
+            st.caption(f"Check-ins per {checkin_stats.bucket_minutes} minutes")
+            st.bar_chart(pd.Series(checkin_stats.per_bucket, name="Check-ins").sort_index())
+        if backend.last_write:
+            st.caption(f"{backend.name} writes: {backend.total_calls} calls, {backend.total_rows} rows, "
+                       f"{backend.total_bytes} bytes sent (last: {backend.last_write.rows} rows, "
+                       f"{backend.last_write.bytes} bytes)")
+        confirm_latency = next((row for row in metrics.summary() if row["phase"] == "journal.confirm_latency"), None)
+        st.caption(f"Write queue: {journal_flusher.queue_depth()} pending, {journal_flusher.flushed} flushed this session"
+                   + (f" ({journal_flusher.rejected} rejected as already checked in)" if journal_flusher.rejected else "")
+                   + (f", last flush {journal_flusher.last_flush_rows} rows in "
+                      f"{journal_flusher.last_flush_seconds * 1000:.0f} ms"
+                      if journal_flusher.last_flush_seconds is not None else "")
+                   + (f", submit→sheet p50 {confirm_latency['p50_ms']:.0f} ms / p95 {confirm_latency['p95_ms']:.0f} ms"
+                      if confirm_latency else "")
+                   + (f", last error: {journal_flusher.last_error}" if journal_flusher.last_error else ""))
+        backend_stats = get_backend_stats()
+        st.caption(f"Cache: {backend.name} connection {backend_stats.hits} hits / {backend_stats.misses} misses, "
+                   f"log snapshot {log_snapshot.stats.hits} hits / {log_snapshot.stats.misses} full loads / "
+                   f"{log_snapshot.stats.refreshes} incremental refreshes, "
+                   f"{log_snapshot.stats.errors} failed re-reads served stale")
 
         if not checkin_log.empty:
-            st.dataframe(checkin_log)
-
-            # Export as CSV
-            csv = checkin_log.to_csv(index=False).encode('utf-8')
+            with st.expander("🔎 Filter and sort"):
+                filter_col1, filter_col2 = st.columns(2)
+                filter_text = filter_col1.text_input("Name or email contains")
+                sort_by = filter_col2.selectbox("Sort by", list(checkin_log.columns))
+                filter_col3, filter_col4, filter_col5 = st.columns(3)
+
+                def choices(column):
+                    return sorted(checkin_log[column].cat.categories)
+
+                blank_label = lambda value: value or "(blank)"
+                statuses = filter_col3.multiselect("Status", choices("Status"), format_func=blank_label)
+                memberships = filter_col4.multiselect("Membership", choices("Membership Status"), format_func=blank_label)
+                affiliations = filter_col5.multiselect("Affiliation", choices("Affiliation"), format_func=blank_label)
+                time_range = ("", "")
+                try:
+                    first_seen, last_seen = (datetime.strptime(checkin_log["Timestamp"].min(), "%Y-%m-%d %H:%M:%S"),
+                                             datetime.strptime(checkin_log["Timestamp"].max(), "%Y-%m-%d %H:%M:%S"))
+                except (TypeError, ValueError):
+                    first_seen = last_seen = None
+                if first_seen and first_seen < last_seen:
+                    picked = st.slider("Checked in between", min_value=first_seen, max_value=last_seen,
+                                       value=(first_seen, last_seen), format="MM/DD HH:mm")
+                    # Leave the ends open unless narrowed, so rows arriving after this rerun still show
+                    time_range = tuple("" if moment == bound else moment.strftime("%Y-%m-%d %H:%M:%S")
+                                       for moment, bound in zip(picked, (first_seen, last_seen)))
+                descending = st.toggle("Descending", value=True)
+
+            log_filter = LogFilter(filter_text, tuple(statuses), tuple(memberships), tuple(affiliations),
+                                   time_range[0], time_range[1], sort_by, descending)
+            # Matching row positions are reused until the log or the filter changes
+            cached_view = st.session_state.get("log_view")
+            if cached_view and cached_view[0] == log_version and cached_view[1] == log_filter:
+                positions = cached_view[2]
+            else:
+                with metrics.span("organizer.filter"):
+                    positions = filter_positions(checkin_log, log_filter)
+                st.session_state.log_view = (log_version, log_filter, positions)
+            pages = page_count(positions, LOG_PAGE_SIZE)
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+            st.caption(f"Showing {min(len(positions), (page - 1) * LOG_PAGE_SIZE + 1)}–"
+                       f"{min(len(positions), page * LOG_PAGE_SIZE)} of {len(positions)} matching check-ins "
+                       f"({len(checkin_log)} total)")
+            st.dataframe(page_of(checkin_log, positions, page, LOG_PAGE_SIZE), hide_index=True)
+
+            # Exports are encoded only when a download is clicked, once per log version
             st.download_button(
                 label="⬇️ Download CSV",
-                data=csv,
-                file_name="PNANY_checkin_log.csv",
+                data=lambda: export_cache.get("csv", log_version, lambda: csv_bytes(checkin_log)),
+                file_name=f"{event.organization}_checkin_log.csv",
                 mime="text/csv"
             )
-
-            # Export as Excel
-            excel_writer = pd.ExcelWriter("checkin_export.xlsx", engine="xlsxwriter")
-            checkin_log.to_excel(excel_writer, index=False, sheet_name="CheckIns")
-            excel_writer.close()
-            with open("checkin_export.xlsx", "rb") as f:
-                st.download_button(
-                    label="⬇️ Download Excel",
-                    data=f.read(),
-                    file_name="PNANY_checkin_log.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
+            st.download_button(
+                label="⬇️ Download Excel",
+                data=lambda: export_cache.get("xlsx", log_version, lambda: excel_bytes(checkin_log)),
+                file_name=f"{event.organization}_checkin_log.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
         else:
             st.info("ℹ️ No attendees have checked in yet.")
 
     with tab4:
-        st.header("🌟 Attendees Interested in PNANY Membership")
-        if not checkin_log.empty:
-            interested_df = checkin_log[
-                (checkin_log["Membership Status"].str.lower() == "no") &
-                (checkin_log["Interested in Membership"].str.lower() == "yes")
-            ]
-            if not interested_df.empty:
-                st.dataframe(interested_df[["Timestamp", "Name", "Email", "Affiliation"]])
+        st.header(f"🌟 Attendees Interested in {event.organization} Membership")
+        if log_state.stats.total:
+            interested = log_state.stats.interested
+            if interested:
+                st.dataframe(pd.DataFrame(interested, columns=["Timestamp", "Name", "Email", "Affiliation"]))
             else:
                 st.info("No non-members have indicated interest in joining yet.")
         else:
             st.info("ℹ️ No check-ins recorded.")
+
+    with tab7:
+        st.header("📈 Arrivals")
+        with metrics.span("organizer.analytics"):
+            report = arrival_report(log_state)
+        if report is None:
+            st.info("ℹ️ No check-ins recorded.")
+        else:
+            arrived = int(report.per_minute.sum())
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Arrival rate", f"{report.current_rate:.1f}/min", help=f"Last {ARRIVAL_RATE_WINDOW} minutes")
+            col2.metric("Peak window", f"{report.peak_arrivals}",
+                        help=f"Most arrivals in any {ARRIVAL_RATE_WINDOW} minutes")
+            col3.metric("Registered still to arrive", f"{report.roster_remaining}", f"{report.remaining_share:.0%}",
+                        delta_color="off")
+            col4.metric(f"Projected next {ARRIVAL_PROJECTION_MINUTES} min",
+                        f"+{report.projection.iloc[-1] - arrived:.0f}")
+            to_ninety = minutes_until(report, 0.9)
+            st.caption(f"Peak: {report.peak_start.strftime('%H:%M')}–{report.peak_end.strftime('%H:%M')}"
+                       + (f" · 90% of registered attendees in about {to_ninety:.0f} min at the current pace"
+                          if to_ninety else ""))
+            st.line_chart(pd.DataFrame({"Arrivals per minute": report.per_minute,
+                                        f"{ARRIVAL_RATE_WINDOW}-min average": report.rolling_rate}))
+            st.caption("Checked in so far, and projected")
+            st.line_chart(pd.DataFrame({"Checked in": report.per_minute.cumsum(), "Projected": report.projection}))
+
+    with tab8:
+        st.header("🧮 Registration vs. Check-In Log")
+        st.caption("Names and emails are compared after normalizing case, spacing and punctuation. \"Similar\" "
+                   "matches ignore name order, middle initials, and dots or +tags in email addresses.")
+        with metrics.span("organizer.reconciliation"):
+            result = reconciliation_report(log_state)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Registered and checked in", result.matched)
+        col2.metric("No-shows", len(result.no_shows))
+        col3.metric("Walk-ins", len(result.walk_ins))
+        col4.metric("Probable duplicates", result.duplicated)
+        for title, frame, file_name in (
+                ("🚫 Registered, not checked in", result.no_shows, "no_shows"),
+                ("🚶 Checked in, not on the registration list", result.walk_ins, "walk_ins"),
+                ("👯 Probably checked in more than once", result.probable_duplicates, "probable_duplicates")):
+            file_name = f"{event.organization}_{file_name}.csv"
+            with st.expander(f"{title} ({len(frame)})"):
+                if frame.empty:
+                    st.info("ℹ️ None.")
+                    continue
+                if frame is result.walk_ins:
+                    st.caption("Walk-ins with a registration filled in probably registered under that name or email.")
+                st.dataframe(frame, hide_index=True)
+                st.download_button("⬇️ Download CSV", data=lambda frame=frame: csv_bytes(frame), file_name=file_name,
+                                   mime="text/csv", on_click="ignore", key=f"download_{file_name}")
+
+    with tab6:
+        st.header("👥 Batch Check-In")
+        st.caption("For groups arriving together: every attendee is matched against the registration list and the "
+                   "log in one pass and written to the sheet together.")
+        with st.form("batch_checkin_form"):
+            batch_text = st.text_area("Names or emails, one per line")
+            batch_file = st.file_uploader("…or upload a CSV with a Name and/or Email column", type="csv")
+            batch_membership = st.radio("Membership status for this group", ["", "Yes", "No"], horizontal=True,
+                                        format_func=lambda v: v or "Not recorded")
+            batch_affiliation = st.text_input("Workplace or Affiliation (optional)")
+            batch_submitted = st.form_submit_button("✅ Check In Batch")
+
+        if batch_submitted:
+            try:
+                batch_rows = parse_batch_csv(batch_file.getvalue()) if batch_file else parse_batch_text(batch_text)
+            except ValueError as exc:
+                st.error(f"❌ {exc}")
+                batch_rows = []
+            if not batch_rows:
+                st.warning("⚠️ Enter at least one name or email, or upload a CSV.")
+            else:
+                with metrics.span("submit.batch"):
+                    checked_in = log_snapshot.update(lambda state: checkin_batch(
+                        state, batch_rows, roster, checkin_journal, log_columns,
+                        membership_status=batch_membership, affiliation=batch_affiliation))
+                metrics.count("submit.checkins", checked_in)
+                if checked_in:
+                    journal_flusher.notify()
+                report = pd.DataFrame(batch_report(batch_rows))
+                st.success(f"🎉 {checked_in} of {len(batch_rows)} attendees checked in.")
+                st.dataframe(report, hide_index=True)
+                missed = report[report["Result"] != CHECKED_IN]
+                if not missed.empty:
+                    st.download_button("⬇️ Download rows not checked in", data=lambda: csv_bytes(missed),
+                                       file_name=f"{event.organization}_batch_not_checked_in.csv", mime="text/csv", on_click="ignore")
+
+    with tab9:
+        st.header("📋 Registration List")
+        source = (f"loaded from `{cache_path(registration_file)}`" if compiled_roster.from_cache
+                  else "checked and compiled")
+        st.caption(f"`{registration_file}`: {source} in {compiled_roster.load_seconds * 1000:.0f} ms")
+        counts = problem_counts(compiled_roster.problems)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Attendees", len(roster))
+        col2.metric("Rows dropped", counts[ERROR])
+        col3.metric("Warnings", counts[WARNING])
+        col4.metric("Values normalized", counts[FIXED])
+        if compiled_roster.problems:
+            problems = pd.DataFrame([(p.line, p.severity, p.column, p.message) for p in compiled_roster.problems],
+                                    columns=["Line", "Severity", "Column", "Problem"])
+            st.dataframe(problems, hide_index=True)
+            st.download_button("⬇️ Download problems", data=lambda: csv_bytes(problems), mime="text/csv", on_click="ignore",
+                               file_name=f"{event.organization}_registration_problems.csv")
+        else:
+            st.success("✅ No problems found.")
+        st.caption("The list is re-checked automatically when the file changes. An email shared by several "
+                   "attendees stays on their rows but isn't used to look anyone up (e.g. in batch check-in).")
+        if st.button("🔁 Re-check registration list"):
+            with metrics.span("roster.ingest"):
+                load_compiled_roster(registration_file, rebuild=True)
+            get_compiled_roster.clear(registration_file, registration_mtime)
+            st.rerun()
+
+    with tab5:
+        st.header("⏱ Hot-Path Latency")
+        phase_summary = metrics.summary()
+        if phase_summary:
+            st.dataframe(pd.DataFrame(phase_summary).round(2), hide_index=True)
+        else:
+            st.info("ℹ️ No timings recorded yet.")
+        metrics.gauge("journal.queue_depth", journal_flusher.queue_depth())
+        metrics.gauge("events.active", len(event_pool))
+        if metrics.counters or metrics.gauges:
+            st.dataframe(pd.DataFrame(sorted({**metrics.counters, **metrics.gauges}.items()),
+                                      columns=["Counter", "Value"]), hide_index=True)
+        with st.expander("Prometheus text"):
+            st.code(metrics.prometheus_text(), language="text")
+        if METRICS_PORT:
+            st.caption(f"Also served at :{METRICS_PORT}/metrics")
+        st.caption(f"Open events ({len(event_pool)} of at most {MAX_ACTIVE_EVENTS}, released after "
+                   f"{EVENT_IDLE_SECONDS // 60} idle minutes): "
+                   + ", ".join(events[key].title if key in events else key for key in event_pool.active()))
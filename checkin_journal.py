@@ -0,0 +1,212 @@
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RETRYING = "retrying"
+CONFIRMED = "confirmed"
+# Reached the flusher but not the sheet, because the log already has that name or email
+REJECTED = "rejected"
+
+
+class CheckinJournal:
+    """Local append-only record of check-ins, written before the sheet is touched.
+
+    Entries stay pending until the flusher has appended them to the worksheet, so a
+    restart replays anything that never reached Google Sheets. Entries the sheet
+    turned down as duplicates are closed too, but flagged as rejected.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkins ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " payload TEXT NOT NULL,"
+            " recorded_at REAL NOT NULL,"
+            " flushed_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " rejected INTEGER NOT NULL DEFAULT 0)"
+        )
+        if "rejected" not in {row[1] for row in self._conn.execute("PRAGMA table_info(checkins)")}:
+            # Journal written before rejected entries were tracked
+            self._conn.execute("ALTER TABLE checkins ADD COLUMN rejected INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS checkins_pending ON checkins (flushed_at, id)")
+
+    def record(self, entry):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO checkins (payload, recorded_at) VALUES (?, ?)",
+                (json.dumps(entry), time.time()),
+            )
+            return cursor.lastrowid
+
+    def record_many(self, entries):
+        # A whole batch lands in one transaction, so it is either all journaled or not at all
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [self._conn.execute("INSERT INTO checkins (payload, recorded_at) VALUES (?, ?)",
+                                          (json.dumps(entry), now)).lastrowid for entry in entries]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def pending(self, limit=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM checkins WHERE flushed_at IS NULL ORDER BY id LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def pending_entries(self):
+        return [entry for _, entry in self.pending()]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM checkins WHERE flushed_at IS NULL").fetchone()[0]
+
+    def mark_flushed(self, ids, rejected=()):
+        # Returns how long each entry waited between being recorded and reaching the sheet
+        now = time.time()
+        rejected = set(rejected)
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE checkins SET flushed_at = ?, last_error = NULL, rejected = ? WHERE id = ?",
+                [(now, row_id in rejected, row_id) for row_id in ids],
+            )
+            return [now - recorded_at for recorded_at, in self._select("recorded_at", ids)]
+
+    def _select(self, fields, ids):
+        return self._conn.execute(
+            f"SELECT {fields} FROM checkins WHERE id IN ({','.join('?' * len(ids))})", list(ids)
+        ).fetchall()
+
+    def statuses(self, ids):
+        """Map each journal id to PENDING, CONFIRMED (written to the sheet) or REJECTED.
+
+        Pending entries that have failed at least once come back as RETRYING.
+        """
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._select("id, flushed_at, attempts, rejected", ids)
+        return {row_id: (REJECTED if rejected else CONFIRMED) if flushed_at is not None
+                else RETRYING if attempts else PENDING
+                for row_id, flushed_at, attempts, rejected in rows}
+
+    def mark_failed(self, ids, error):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE checkins SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                [(repr(error), row_id) for row_id in ids],
+            )
+
+
+class JournalFlusher:
+    """Background thread that drains pending journal entries to the sheet.
+
+    Submits only write to the journal and call notify(); whatever is pending when
+    the thread wakes goes out as one backend write. Failures back off
+    exponentially. Entries the backend reports as not written (the log already
+    had that person) are marked rejected. Flush time, per-entry confirm latency
+    and queue depth are reported to `metrics`.
+    """
+
+    def __init__(self, journal, writer, window=0.0, batch_size=500, base_delay=1.0, max_delay=60.0, metrics=None):
+        self.journal = journal
+        self.writer = writer
+        self.metrics = metrics
+        self.window = window
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.last_error = None
+        self.flushed = 0
+        self.rejected = 0
+        self.last_flush_rows = 0
+        self.last_flush_seconds = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkin-journal-flusher", daemon=True)
+
+    def start(self):
+        # Anything left pending by a previous process is replayed on the first pass
+        self._thread.start()
+        return self
+
+    def notify(self):
+        self._wake.set()
+
+    def queue_depth(self):
+        return self.journal.pending_count()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self.journal.pending(self.batch_size)
+            if not batch:
+                self._wake.wait()
+                self._wake.clear()
+                if self.window:
+                    self._stop.wait(self.window)
+                continue
+
+            ids = [row_id for row_id, _ in batch]
+            started = time.perf_counter()
+            try:
+                stats = self.writer.write([entry for _, entry in batch])
+            except Exception as exc:
+                if self.metrics is not None:
+                    self.metrics.observe("journal.flush", time.perf_counter() - started, error=True)
+                    self.metrics.count("journal.flush_retries")
+                self.failures += 1
+                self.last_error = repr(exc)
+                self.journal.mark_failed(ids, exc)
+                delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning("Flushing %d check-in(s) failed, retrying in %.1fs: %r", len(ids), delay, exc)
+                self._stop.wait(delay)
+                continue
+
+            self.last_flush_seconds = time.perf_counter() - started
+            rejected = [row_id for row_id, written in zip(ids, stats.written) if not written]
+            if rejected:
+                logger.warning("%d check-in(s) not written: the log already has that name or email", len(rejected))
+            waits = self.journal.mark_flushed(ids, rejected)
+            if self.metrics is not None:
+                self.metrics.observe("journal.flush", self.last_flush_seconds)
+                self.metrics.count("journal.flushed_rows", len(ids))
+                if rejected:
+                    self.metrics.count("journal.rejected_rows", len(rejected))
+                for wait in waits:
+                    self.metrics.observe("journal.confirm_latency", wait)
+                self.metrics.gauge("journal.queue_depth", self.journal.pending_count())
+            self.failures = 0
+            self.last_error = None
+            self.flushed += len(ids)
+            self.rejected += len(rejected)
+            self.last_flush_rows = len(ids)
@@ -0,0 +1,205 @@
+import itertools
+from collections import Counter
+
+from checkin_stats import CheckinStats
+from log_store import ColumnarLog
+
+# Process-wide counter so every load or append gets a distinct log version
+_versions = itertools.count(1)
+
+# Status written over a row another kiosk appended for someone already checked in
+DUPLICATE_STATUS = "Duplicate"
+
+
+def normalize_key(value):
+    return str(value).strip().lower()
+
+
+class DuplicateIndex:
+    # Normalized names and emails already in the log, for O(1) duplicate checks
+    def __init__(self, names=(), emails=()):
+        self.names = set()
+        self.emails = set()
+        for name in names:
+            self._add(self.names, name)
+        for email in emails:
+            self._add(self.emails, email)
+
+    @staticmethod
+    def _add(keys, value):
+        key = normalize_key(value)
+        if key:
+            keys.add(key)
+
+    def add(self, name, email):
+        self._add(self.names, name)
+        self._add(self.emails, email)
+
+    def seen(self, name, email):
+        return normalize_key(name) in self.names or normalize_key(email) in self.emails
+
+    def discard(self, name, email):
+        self.names.discard(normalize_key(name))
+        self.emails.discard(normalize_key(email))
+
+    def __len__(self):
+        return max(len(self.names), len(self.emails))
+
+
+def column_letter(number):
+    letters = ""
+    while number:
+        number, rem = divmod(number - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class CheckinLogState:
+    # The check-in log plus the indexes kept next to it; rebuilt only when the sheet is reloaded
+    def __init__(self, entries=(), columns=(), header=(), sheet_rows=0, last_row=()):
+        entries = list(entries)
+        self.log = ColumnarLog(columns, entries)
+        self.index = DuplicateIndex((e.get("Name", "") for e in entries), (e.get("Email", "") for e in entries))
+        self.stats = CheckinStats(entries)
+        self.version = next(_versions)
+        # Where the sheet read stopped, so refreshes only fetch rows added after it
+        self.header = list(header)
+        self.sheet_rows = sheet_rows
+        self.last_row = list(last_row)
+        # Set when the state came from a local mirror instead of the sheet
+        self.offline = False
+        # Check-ins this process added itself, waiting to come back in a refresh of the store
+        self._echoes = Counter()
+
+    @property
+    def frame(self):
+        # Built on demand (export, st.dataframe) and cached by the log until the next append
+        return self.log.to_frame()
+
+    @staticmethod
+    def _echo_key(entry):
+        # Name and email only: Sheets may reformat other cells (e.g. the timestamp) of a row it stores
+        return normalize_key(entry["Name"]), normalize_key(entry["Email"])
+
+    def _add(self, entries):
+        for entry in entries:
+            self.index.add(entry["Name"], entry["Email"])
+            self.stats.add(entry)
+        if entries:
+            self.log.extend(entries)
+            self.version = next(_versions)
+        return len(entries)
+
+    def extend(self, entries):
+        """Merge rows read back from the store, as a full load would.
+
+        Every row is kept, even one whose name or email is already in the log,
+        except this process's own check-ins (see add_local) coming back.
+        """
+        fresh = []
+        for entry in entries:
+            key = self._echo_key(entry)
+            if self._echoes[key]:
+                self._echoes[key] -= 1
+                continue
+            fresh.append(entry)
+        return self._add(fresh)
+
+    def add_local(self, entries):
+        # Check-ins journaled by this process; skipped if already in the log, and remembered so
+        # extend() doesn't count them twice when the store returns them
+        fresh = []
+        for entry in entries:
+            if self.index.seen(entry["Name"], entry["Email"]):
+                continue
+            self.index.add(entry["Name"], entry["Email"])
+            self._echoes[self._echo_key(entry)] += 1
+            fresh.append(entry)
+        return self._add(fresh)
+
+    def append(self, entry):
+        return self.add_local([entry]) == 1
+
+
+def _sheet_entries(header, rows):
+    # Turn raw sheet rows into entries, dropping blank and duplicate-marked rows
+    width = len(header)
+    for row in rows:
+        row = list(row[:width]) + [""] * (width - len(row))
+        entry = dict(zip(header, row))
+        if any(row) and entry.get("Status") != DUPLICATE_STATUS:
+            yield entry
+
+
+def load_log_state(worksheet, columns, journal=None):
+    # The journal is read first: an entry flushed while the sheet is read is then in one or the other
+    pending = journal.pending_entries() if journal is not None else []
+    values = worksheet.get_all_values()
+    header = values[0] if values else []
+    sheet_columns = list(dict.fromkeys(c for c in header if c))
+    state = CheckinLogState(_sheet_entries(header, values[1:]),
+                            columns=sheet_columns + [c for c in columns if c not in sheet_columns],
+                            header=header, sheet_rows=len(values), last_row=values[-1] if len(values) > 1 else ())
+    # Check-ins still waiting in the journal count as checked in
+    state.add_local(pending)
+    return state
+
+
+def reload_log_state(state, load):
+    """Replace `state` with a full reload, read without the snapshot lock held.
+
+    Returns apply(current) -> new state, to be called under the lock.
+    Check-ins added to `state` while `load` ran are carried over to the new
+    state.
+    """
+    start = len(state.log)
+    fresh = load()
+
+    def apply(current):
+        fresh.add_local(list(current.log.records(start)))
+        return fresh
+    return apply
+
+
+def refresh_log_state(state, worksheet, columns, journal=None):
+    """Fetch only the rows appended since `state` was read.
+
+    Only reads: returns apply(current) -> state, which merges the rows in and
+    is meant to run under the snapshot lock (see TTLSnapshot). The header and
+    the last row already seen are re-read in the same request. If either
+    changed (columns edited, rows deleted or re-sorted), the log is reloaded in
+    full instead.
+    """
+    def reload():
+        return reload_log_state(state, lambda: load_log_state(worksheet, columns, journal))
+
+    if state.sheet_rows < 2:
+        return reload()
+    last = column_letter(len(state.header))
+    n = state.sheet_rows
+    header, tail, new_rows = worksheet.batch_get([f"A1:{last}1", f"A{n}:{last}{n}", f"A{n + 1}:{last}"])
+
+    def padded(row):
+        return list(row) + [""] * (len(state.header) - len(row))
+
+    if padded(header[0] if header else []) != padded(state.header) or \
+            padded(tail[0] if tail else []) != padded(state.last_row):
+        return reload()
+
+    def apply(current):
+        if new_rows:
+            current.extend(list(_sheet_entries(current.header, new_rows)))
+            current.sheet_rows += len(new_rows)
+            current.last_row = list(new_rows[-1])
+        return current
+    return apply
+
+
+def record_checkin(state, entry, journal):
+    # Callers hold the snapshot lock, so two sessions can't both check in the same person.
+    # Returns the journal id to follow the entry's write status with, or None for a duplicate
+    if state.index.seen(entry["Name"], entry["Email"]):
+        return None
+    journal_id = journal.record(entry)
+    state.append(entry)
+    return journal_id
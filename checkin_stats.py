@@ -0,0 +1,50 @@
+from collections import Counter
+
+from analytics import arrival_minute, bucket_counts, minute_counts
+
+
+def _flag(value):
+    return str(value).strip().lower()
+
+
+class CheckinStats:
+    """Organizer counters kept up to date one check-in at a time.
+
+    Built once when the log is loaded and then fed each appended entry, so the
+    dashboard reads totals without rescanning the log. Arrivals are kept per
+    minute (timestamps of the initial load are parsed in one vectorized pass);
+    coarser buckets and the analytics module work from those counts.
+    """
+
+    def __init__(self, entries=(), bucket_minutes=15):
+        self.bucket_minutes = bucket_minutes
+        self.total = 0
+        self.by_status = Counter()
+        self.members = 0
+        self.non_members = 0
+        self.interested = []
+        entries = list(entries)
+        for entry in entries:
+            self._count(entry)
+        self.per_minute = minute_counts(entry.get("Timestamp", "") for entry in entries)
+
+    @property
+    def per_bucket(self):
+        return bucket_counts(self.per_minute, self.bucket_minutes)
+
+    def _count(self, entry):
+        self.total += 1
+        self.by_status[str(entry.get("Status", "")).strip() or "Unknown"] += 1
+        membership = _flag(entry.get("Membership Status", ""))
+        if membership == "yes":
+            self.members += 1
+        elif membership == "no":
+            self.non_members += 1
+            if _flag(entry.get("Interested in Membership", "")) == "yes":
+                self.interested.append(entry)
+
+    def add(self, entry):
+        self._count(entry)
+        minute = arrival_minute(entry.get("Timestamp", ""))
+        if minute is not None:
+            self.per_minute[minute] += 1
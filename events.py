@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+
+EVENT_KEY_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+@dataclass(frozen=True)
+class Event:
+    # Everything that differs between the events one deployment serves
+    key: str
+    title: str
+    sheet_name: str
+    registration_file: str
+    # Shown in the membership questions and used to name downloads
+    organization: str = "PNANY"
+    organizer_password: str = ""
+    # This event's share of the Sheets quota; 0 splits the deployment-wide one with the events on the same account
+    reads_per_minute: int = 0
+    writes_per_minute: int = 0
+    # Name of the st.secrets entry holding this event's service account
+    credentials_secret: str = "GOOGLE_CREDENTIALS"
+
+
+def load_events(path, default):
+    """Events from a JSON list of objects with Event's fields, in file order.
+
+    Without the file the deployment serves just `default`. Raises ValueError for
+    a malformed file rather than silently falling back.
+    """
+    if not os.path.exists(path):
+        return {default.key: default}
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    if not isinstance(records, list) or not records:
+        raise ValueError(f"{path} must contain a non-empty list of events")
+    known = {field.name for field in fields(Event)}
+    events = {}
+    for record in records:
+        unknown = set(record) - known
+        if unknown:
+            raise ValueError(f"{path}: unknown event setting(s) {', '.join(sorted(unknown))}")
+        try:
+            event = Event(**record)
+        except TypeError as exc:
+            raise ValueError(f"{path}: {exc}") from None
+        if not EVENT_KEY_PATTERN.match(event.key):
+            raise ValueError(f"{path}: event key {event.key!r} must be lowercase letters, digits, '-' or '_'")
+        if event.key in events:
+            raise ValueError(f"{path}: event key {event.key!r} is used twice")
+        events[event.key] = event
+    return events
+
+
+def event_path(path, event, default):
+    # Local files (journal, mirror) are kept per event; the built-in event keeps the original file names
+    if event.key == default.key:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{event.key}{ext}"
+
+
+class EventPool:
+    """Which events have open resources, least recently used first.
+
+    Every rerun for an event touches it. evict() releases events that have gone
+    `idle_seconds` without a touch, then the least recently used ones beyond
+    `max_active`, skipping any that `busy` says still have work in flight.
+    """
+
+    def __init__(self, idle_seconds, max_active):
+        self.idle_seconds = idle_seconds
+        self.max_active = max_active
+        self._last_used = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._last_used)
+
+    def touch(self, key):
+        with self._lock:
+            self._last_used[key] = time.monotonic()
+            self._last_used.move_to_end(key)
+
+    def active(self):
+        with self._lock:
+            return list(self._last_used)
+
+    def evict(self, release, busy=lambda key: False):
+        now = time.monotonic()
+        with self._lock:
+            # Least recently used first; the most recent one is the event this rerun is serving
+            order = list(self._last_used.items())[:-1]
+            over = len(self._last_used) - self.max_active
+        released = []
+        for key, used in order:
+            if (now - used < self.idle_seconds and over <= 0) or busy(key):
+                continue
+            with self._lock:
+                if self._last_used.get(key) != used:
+                    # Touched again while we were checking: still in use
+                    continue
+                del self._last_used[key]
+            release(key)
+            released.append(key)
+            over -= 1
+        return released
@@ -0,0 +1,60 @@
+import csv
+import io
+import threading
+
+CSV_CHUNK_ROWS = 5000
+
+
+def iter_csv_chunks(frame, chunk_rows=CSV_CHUNK_ROWS):
+    # Encode the log a slice at a time so only one encoded chunk is alive at once
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(frame.columns)
+    for start in range(0, len(frame), chunk_rows):
+        writer.writerows(frame.iloc[start:start + chunk_rows].itertuples(index=False, name=None))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_csv(frame, fileobj, chunk_rows=CSV_CHUNK_ROWS):
+    for chunk in iter_csv_chunks(frame, chunk_rows):
+        fileobj.write(chunk)
+
+
+def csv_bytes(frame):
+    output = io.BytesIO()
+    write_csv(frame, output)
+    return output.getvalue()
+
+
+def excel_bytes(frame, sheet_name="CheckIns"):
+    import xlsxwriter
+
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"in_memory": True, "strings_to_formulas": False})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, list(frame.columns))
+    for row, values in enumerate(frame.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row, 0, ["" if v is None or v != v else v for v in values])
+    workbook.close()
+    return output.getvalue()
+
+
+class ExportCache:
+    # Encoded exports for the latest log version only, built on first download request
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, kind, version, build):
+        with self._lock:
+            cached = self._entries.get(kind)
+            if cached and cached[0] == version:
+                return cached[1]
+        data = build()
+        with self._lock:
+            self._entries[kind] = (version, data)
+        return data
@@ -0,0 +1,97 @@
+import re
+import threading
+import time
+from collections import deque
+
+from checkin_state import column_letter
+
+_RANGE = re.compile(r"^A(\d+):([A-Z]+)(\d*)$")
+
+
+_WRITES = {"update", "update_cell", "append_rows"}
+
+
+class QuotaExceeded(Exception):
+    # Mirrors the HTTP status gspread's APIError carries for a rate-limited call
+    code = 429
+
+
+class FakeWorksheet:
+    """In-memory stand-in for a gspread worksheet, for stress tests and offline runs.
+
+    Implements the handful of calls the app makes; `latency` seconds are slept per call
+    so concurrent writers interleave the way they would against the real API, and
+    `read_quota` / `write_quota` cap calls per rolling minute like Google's limits.
+    """
+
+    def __init__(self, rows=None, latency=0.0, title="Sheet1", read_quota=None, write_quota=None):
+        self.rows = [list(r) for r in rows or []]
+        self.latency = latency
+        self.title = title
+        self.quotas = {"read": read_quota, "write": write_quota}
+        self.calls = {}
+        self.rejected = 0
+        self._recent = {"read": deque(), "write": deque()}
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        kind = "write" if name in _WRITES else "read"
+        quota = self.quotas[kind]
+        if quota is not None:
+            now = time.monotonic()
+            with self._lock:
+                recent = self._recent[kind]
+                while recent and now - recent[0] >= 60:
+                    recent.popleft()
+                if len(recent) >= quota:
+                    self.rejected += 1
+                    raise QuotaExceeded(f"Quota exceeded for {kind} requests per minute")
+                recent.append(now)
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_all_values(self, **kwargs):
+        self._call("get_all_values")
+        with self._lock:
+            return [list(r) for r in self.rows]
+
+    def _range(self, range_name):
+        start, _, end = _RANGE.match(range_name).groups()
+        stop = int(end) if end else len(self.rows)
+        return [list(r) for r in self.rows[int(start) - 1:stop]]
+
+    def get(self, range_name, **kwargs):
+        self._call("get")
+        with self._lock:
+            return self._range(range_name)
+
+    def batch_get(self, ranges, **kwargs):
+        self._call("batch_get")
+        with self._lock:
+            return [self._range(r) for r in ranges]
+
+    def update(self, values, range_name="A1", **kwargs):
+        self._call("update")
+        row = int(range_name.lstrip("A") or 1)
+        with self._lock:
+            while len(self.rows) < row + len(values) - 1:
+                self.rows.append([])
+            for offset, value in enumerate(values):
+                self.rows[row - 1 + offset] = list(value)
+
+    def update_cell(self, row, col, value):
+        self._call("update_cell")
+        with self._lock:
+            cells = self.rows[row - 1]
+            cells.extend([""] * (col - len(cells)))
+            cells[col - 1] = value
+
+    def append_rows(self, values, **kwargs):
+        self._call("append_rows")
+        with self._lock:
+            start = len(self.rows) + 1
+            self.rows.extend(list(v) for v in values)
+            end = len(self.rows)
+        last = column_letter(max((len(v) for v in values), default=1))
+        return {"updates": {"updatedRange": f"{self.title}!A{start}:{last}{end}", "updatedRows": len(values)}}
@@ -0,0 +1,137 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    rank = min(len(sorted_samples) - 1, max(0, round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[rank]
+
+
+class Metrics:
+    """Process-wide latency samples and counters for the check-in hot path.
+
+    Each phase keeps its most recent `window` durations for p50/p95/p99; counters
+    track API calls, errors and retries, and gauges hold current levels such as
+    queue depth. Every finished span is also logged as a
+    JSON line at DEBUG level on the "instrumentation" logger.
+    """
+
+    def __init__(self, window=2048):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = Counter()
+        self.counters = Counter()
+        self.gauges = {}
+
+    def observe(self, phase, seconds, error=False):
+        with self._lock:
+            samples = self._samples.get(phase)
+            if samples is None:
+                samples = self._samples[phase] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._totals[phase] += 1
+            if error:
+                self.counters[f"{phase}.errors"] += 1
+        logger.debug(json.dumps({"phase": phase, "seconds": round(seconds, 6), "error": error}))
+
+    @contextmanager
+    def span(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe(phase, time.perf_counter() - started, error=True)
+            raise
+        self.observe(phase, time.perf_counter() - started)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def summary(self):
+        with self._lock:
+            phases = {phase: sorted(samples) for phase, samples in self._samples.items()}
+            totals = dict(self._totals)
+        return [
+            {"phase": phase, "count": totals[phase],
+             "p50_ms": percentile(samples, 0.50) * 1000,
+             "p95_ms": percentile(samples, 0.95) * 1000,
+             "p99_ms": percentile(samples, 0.99) * 1000}
+            for phase, samples in sorted(phases.items())
+        ]
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP checkin_phase_seconds Latency of check-in app phases over the recent window.",
+            "# TYPE checkin_phase_seconds summary",
+        ]
+        for row in self.summary():
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'checkin_phase_seconds{{phase="{row["phase"]}",quantile="{quantile}"}} '
+                             f'{row[key] / 1000:.6f}')
+            lines.append(f'checkin_phase_seconds_count{{phase="{row["phase"]}"}} {row["count"]}')
+        lines.append("# TYPE checkin_events_total counter")
+        with self._lock:
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            lines.append(f'checkin_events_total{{name="{name}"}} {value}')
+        lines.append("# TYPE checkin_gauge gauge")
+        with self._lock:
+            gauges = sorted(self.gauges.items())
+        for name, value in gauges:
+            lines.append(f'checkin_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedWorksheet:
+    # Wraps a worksheet so every API call is timed and counted under "sheets.<method>"
+    def __init__(self, worksheet, metrics):
+        self._worksheet = worksheet
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attr = getattr(self._worksheet, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._metrics.count("sheets.api_calls")
+            with self._metrics.span(f"sheets.{name}"):
+                return attr(*args, **kwargs)
+        return call
+
+
+def start_metrics_server(metrics, port, host="0.0.0.0"):
+    # Serves metrics.prometheus_text() at /metrics from a daemon thread
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,153 @@
+import itertools
+import threading
+from array import array
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Columns with few distinct values are stored as integer codes into a table of their values
+CATEGORICAL_COLUMNS = ("Status", "Membership Status", "Interested in Membership", "Credentials", "Affiliation")
+
+# Text columns collect this many new values before sealing them into one immutable Arrow chunk
+TEXT_CHUNK_ROWS = 4096
+
+
+def _cell(value):
+    return "" if value is None or value != value else str(value)
+
+
+class _CodedColumn:
+    # Dictionary-encoded column: each distinct value is kept once, rows hold a 4-byte code
+    def __init__(self):
+        self.codes = array("i")
+        self.values = []
+        self._lookup = {}
+
+    def append(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        values = self.values
+        return (values[code] for code in self.codes[start:])
+
+    def snapshot(self):
+        return self.codes[:], list(self.values)
+
+    @staticmethod
+    def to_array(snapshot):
+        codes, values = snapshot
+        codes = np.frombuffer(codes, dtype=np.intc) if codes else np.empty(0, dtype=np.intc)
+        return pd.Categorical.from_codes(codes, categories=pd.Index(values, dtype=object))
+
+
+class _TextColumn:
+    # Mostly-unique strings (names, emails, timestamps) packed into Arrow chunks plus a short Python tail
+    def __init__(self):
+        self.chunks = []
+        self.tail = []
+
+    def append(self, value):
+        self.tail.append(value)
+        if len(self.tail) >= TEXT_CHUNK_ROWS:
+            self.chunks.append(pa.array(self.tail, type=pa.string()))
+            self.tail = []
+
+    def __getitem__(self, i):
+        chunk, offset = divmod(i, TEXT_CHUNK_ROWS)
+        if chunk < len(self.chunks):
+            return self.chunks[chunk][offset].as_py()
+        return self.tail[offset]
+
+    def __iter__(self):
+        return self.iter_from(0)
+
+    def iter_from(self, start):
+        # Chunks and tail are captured now, not on the first next(), so a caller holding the log's lock
+        # gets a consistent view
+        first, offset = divmod(start, TEXT_CHUNK_ROWS)
+        chunks, tail = self.chunks[first:], self.tail[max(0, start - len(self.chunks) * TEXT_CHUNK_ROWS):]
+        return itertools.chain(itertools.chain.from_iterable(
+            chunk.slice(offset if i == 0 else 0).to_pylist() for i, chunk in enumerate(chunks)), tail)
+
+    def snapshot(self):
+        return list(self.chunks), self.tail[:]
+
+    @staticmethod
+    def to_array(snapshot):
+        chunks, tail = snapshot
+        # Sealed chunks are handed to pandas as-is; only the tail is converted
+        return pd.arrays.ArrowStringArray(pa.chunked_array(chunks + [pa.array(tail, type=pa.string())],
+                                                           type=pa.string()))
+
+
+class ColumnarLog:
+    """The check-in log as one growable column store per field.
+
+    Appending touches only the column stores (amortized O(1), nothing already
+    stored is copied), low-cardinality columns are dictionary-encoded, and a
+    DataFrame is built only when one is asked for and reused until the next append.
+    """
+
+    def __init__(self, columns, entries=()):
+        self.columns = list(columns)
+        self._data = {col: _CodedColumn() if col in CATEGORICAL_COLUMNS else _TextColumn() for col in self.columns}
+        self._length = 0
+        self._frame = None
+        self._lock = threading.Lock()
+        self.extend(entries)
+
+    def __len__(self):
+        return self._length
+
+    def extend(self, entries):
+        data = self._data
+        added = 0
+        with self._lock:
+            for entry in entries:
+                for col in self.columns:
+                    data[col].append(_cell(entry.get(col, "")))
+                added += 1
+            if added:
+                self._length += added
+                self._frame = None
+        return added
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def column(self, name):
+        return self._data[name]
+
+    def row(self, i):
+        return {col: self._data[col][i] for col in self.columns}
+
+    def records(self, start=0):
+        # Safe to call without the snapshot lock: rows appended after this call are not included
+        with self._lock:
+            columns = [self._data[col].iter_from(start) for col in self.columns]
+            length = self._length
+        return (dict(zip(self.columns, values)) for values in itertools.islice(zip(*columns), max(0, length - start)))
+
+    def to_frame(self):
+        with self._lock:
+            if self._frame is not None:
+                return self._frame
+            snapshots = {col: data.snapshot() for col, data in self._data.items()}
+            length = self._length
+        frame = pd.DataFrame({col: type(self._data[col]).to_array(snapshot) for col, snapshot in snapshots.items()},
+                             columns=self.columns)
+        with self._lock:
+            if self._length == length:
+                self._frame = frame
+        return frame
@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ("Name", "Email")
+
+
+@dataclass(frozen=True)
+class LogFilter:
+    # What the organizer log viewer is currently showing; hashable so a result can be reused across reruns
+    text: str = ""
+    statuses: tuple = ()
+    memberships: tuple = ()
+    affiliations: tuple = ()
+    # Inclusive "YYYY-mm-dd HH:MM:SS" bounds; the log's timestamps sort correctly as strings
+    start: str = ""
+    end: str = ""
+    sort_by: str = "Timestamp"
+    descending: bool = True
+
+
+def _sort_key(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Categories are stored in first-seen order; rank them alphabetically instead
+        ranks = np.argsort(np.argsort(column.cat.categories.astype(str)))
+        codes = column.cat.codes.to_numpy()
+        return np.where(codes >= 0, ranks[codes], -1)
+    return column
+
+
+def filter_positions(frame, log_filter):
+    """Row positions of `frame` matching `log_filter`, in display order.
+
+    Every test is a vectorized pass over a column of the shared log frame; only
+    the matching positions are materialized, never a filtered copy of the log.
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    text = log_filter.text.strip()
+    if text:
+        hits = np.zeros(len(frame), dtype=bool)
+        for col in TEXT_COLUMNS:
+            hits |= frame[col].str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+        mask &= hits
+    for col, values in (("Status", log_filter.statuses), ("Membership Status", log_filter.memberships),
+                        ("Affiliation", log_filter.affiliations)):
+        if values:
+            mask &= frame[col].isin(values).to_numpy()
+    if log_filter.start:
+        mask &= (frame["Timestamp"] >= log_filter.start).fillna(False).to_numpy(dtype=bool)
+    if log_filter.end:
+        mask &= (frame["Timestamp"] <= log_filter.end).fillna(False).to_numpy(dtype=bool)
+
+    positions = np.flatnonzero(mask)
+    if log_filter.sort_by and len(positions):
+        key = _sort_key(frame[log_filter.sort_by])
+        key = key[positions] if isinstance(key, np.ndarray) else key.take(positions)
+        order = np.asarray(pd.Series(key).argsort(kind="stable"))
+        positions = positions[order[::-1] if log_filter.descending else order]
+    return positions
+
+
+def page_of(frame, positions, page, page_size):
+    # Only the rows on this page are taken out of the log and sent to the browser
+    start = (page - 1) * page_size
+    return frame.take(positions[start:start + page_size])
+
+
+def page_count(positions, page_size):
+    return max(1, -(-len(positions) // page_size))
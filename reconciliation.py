@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+EXACT_EMAIL = "email"
+EXACT_NAME = "name"
+ALIAS_EMAIL = "similar email"
+SIMILAR_NAME = "similar name"
+
+# Exact links win over fuzzy ones when a log row matches several ways
+_STRENGTH = {EXACT_EMAIL: 0, EXACT_NAME: 1, ALIAS_EMAIL: 2, SIMILAR_NAME: 3}
+
+
+def _text(values):
+    return pd.Series(values, dtype="str").fillna("")
+
+
+def normalize_names(values):
+    # Lowercase, punctuation dropped, whitespace collapsed: "Sarte,  Alfred J." -> "sarte alfred j"
+    return (_text(values).str.lower().str.replace(r"[^\w\s]", " ", regex=True)
+            .str.replace(r"\s+", " ", regex=True).str.strip())
+
+
+def normalize_emails(values):
+    return _text(values).str.strip().str.lower()
+
+
+def name_tokens_key(names):
+    # First and last name regardless of order, middle names/initials dropped: "alfred joseph h sarte" -> "alfred sarte"
+    words = names.str.replace(r"\b\w\b", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+    first, last = words.str.replace(r" .*$", "", regex=True), words.str.replace(r"^.* ", "", regex=True)
+    key = first.where(first <= last, last) + " " + last.where(first <= last, first)
+    return key.where(words != "", "")
+
+
+def email_alias_key(emails):
+    # Same mailbox spelled differently: "+tags" and dots in the local part are ignored
+    local = emails.str.replace(r"[+@].*$", "", regex=True).str.replace(".", "", regex=False)
+    domain = emails.str.replace(r"^[^@]*@", "", regex=True)
+    return (local + "@" + domain).where(emails.str.contains("@", regex=False), "")
+
+
+def _keys(names, emails):
+    name = normalize_names(names)
+    email = normalize_emails(emails)
+    return pd.DataFrame({
+        EXACT_EMAIL: email, EXACT_NAME: name, ALIAS_EMAIL: email_alias_key(email), SIMILAR_NAME: name_tokens_key(name),
+    })
+
+
+def roster_keys(roster):
+    # Built once per roster file; the columns are the join keys, the index is the roster row
+    attendees = list(roster.by_name.values())
+    keys = _keys([a.name for a in attendees], [a.email for a in attendees])
+    keys["Registered name"] = [a.name for a in attendees]
+    keys["Registered email"] = [a.email for a in attendees]
+    return keys
+
+
+@dataclass
+class Reconciliation:
+    no_shows: pd.DataFrame
+    walk_ins: pd.DataFrame
+    probable_duplicates: pd.DataFrame
+    matched: int
+    # Registrations behind probable_duplicates (it has one row per log entry)
+    duplicated: int
+
+
+def reconcile(registered, log):
+    """Join the roster (from roster_keys) against the check-in log frame.
+
+    Each key is a hash join (DataFrame.merge) on a normalized column: exact
+    email, then exact name, then fuzzy keys (email ignoring dots/+tags, first and
+    last name ignoring order and middle initials) for log rows with no exact
+    match. Every log row keeps its strongest link. Roster rows with no link are
+    no-shows, log rows with no exact link are walk-ins (with the registration they
+    probably belong to, if any), and registrations linked from two or more log
+    rows are probable duplicates.
+    """
+    checked_in = _keys(log["Name"], log["Email"])
+    checked_in["row"] = range(len(checked_in))
+
+    links = []
+    exact_rows = pd.Index([])
+    for key in (EXACT_EMAIL, EXACT_NAME, ALIAS_EMAIL, SIMILAR_NAME):
+        left = checked_in[checked_in[key] != ""]
+        if key in (ALIAS_EMAIL, SIMILAR_NAME):
+            left = left[~left["row"].isin(exact_rows)]
+        right = registered[registered[key] != ""][[key]].reset_index(names="registration")
+        # A key shared by several registrations is ambiguous; link it to the first only
+        right = right.drop_duplicates(key)
+        pairs = left[["row", key]].merge(right, on=key, how="inner")[["row", "registration"]]
+        pairs["match"] = key
+        links.append(pairs)
+        if key == EXACT_NAME:
+            exact_rows = pd.Index(pd.concat(links)["row"].unique())
+    links = pd.concat(links, ignore_index=True)
+    links["strength"] = links["match"].map(_STRENGTH)
+    best = links.sort_values(["row", "strength"]).drop_duplicates("row")
+
+    no_shows = registered.loc[~registered.index.isin(best["registration"]), ["Registered name", "Registered email"]]
+    no_shows = no_shows.rename(columns={"Registered name": "Name", "Registered email": "Email"})
+
+    entries = log[["Timestamp", "Name", "Email", "Status"]].reset_index(drop=True)
+    walk_ins = entries.loc[~entries.index.isin(exact_rows)].join(
+        best.set_index("row")[["registration", "match"]], how="left")
+    walk_ins = walk_ins.join(registered[["Registered name", "Registered email"]], on="registration")
+    walk_ins = walk_ins.drop(columns="registration").rename(columns={"match": "Match"})
+    walk_ins = walk_ins.fillna({"Match": "", "Registered name": "", "Registered email": ""})
+
+    repeated = best[best.duplicated("registration", keep=False)]
+    duplicates = (repeated.join(entries, on="row")
+                  .join(registered[["Registered name", "Registered email"]], on="registration")
+                  .sort_values(["registration", "Timestamp"]))
+    duplicates = duplicates[["Registered name", "Registered email", "Timestamp", "Name", "Email", "Status", "match"]]
+    duplicates = duplicates.rename(columns={"match": "Match"}).reset_index(drop=True)
+
+    return Reconciliation(no_shows=no_shows.reset_index(drop=True), walk_ins=walk_ins.reset_index(drop=True),
+                          probable_duplicates=duplicates, matched=int(best["registration"].nunique()),
+                          duplicated=int(repeated["registration"].nunique()))
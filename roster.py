@@ -0,0 +1,165 @@
+import csv
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from checkin_state import normalize_key
+
+COLUMNS = ("Name", "Email", "Credentials", "Membership Note")
+
+# Problem severities: the row was dropped / kept but needs a look / kept after a normalization
+ERROR = "error"
+WARNING = "warning"
+FIXED = "fixed"
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Lowercase name particles that stay lowercase unless they start the name
+_PARTICLES = {"da", "das", "de", "del", "dela", "della", "di", "dos", "la", "le", "van", "von", "y"}
+_ROMAN = re.compile(r"^[IVX]+$")
+# Spreadsheet exports write these for empty cells
+_BLANKS = {"nan", "none", "null", "n/a"}
+
+
+@dataclass(frozen=True)
+class Attendee:
+    name: str
+    email: str
+    credentials: str
+    membership_note: str
+
+
+@dataclass(frozen=True)
+class Roster:
+    # Pre-sorted selectbox names plus a name -> Attendee lookup, built once per CSV mtime
+    names: tuple
+    by_name: MappingProxyType
+    mtime: float
+    # Normalized name or email -> Attendee, for lookups from typed or uploaded lists
+    by_key: MappingProxyType
+    # Emails listed for more than one attendee (e.g. an office address); left out of by_key
+    shared_emails: frozenset = frozenset()
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, value):
+        return self.by_key.get(normalize_key(value))
+
+    def __reduce__(self):
+        # Pickled column-wise with lookups as row positions (mapping proxies can't be pickled, and
+        # rebuilding the attendees from columns is several times faster than unpickling each one)
+        attendees = list(self.by_name.values())
+        position = {id(attendee): i for i, attendee in enumerate(attendees)}
+        columns = tuple([getattr(attendee, field) for attendee in attendees] for field in _ATTENDEE_FIELDS)
+        by_key = {key: position[id(attendee)] for key, attendee in self.by_key.items()}
+        return _rebuild_roster, (self.names, columns, self.mtime, by_key, self.shared_emails)
+
+
+_ATTENDEE_FIELDS = ("name", "email", "credentials", "membership_note")
+
+
+def _rebuild_roster(names, columns, mtime, by_key, shared_emails):
+    attendees = list(map(Attendee, *columns))
+    return Roster(names=names, by_name=MappingProxyType({attendee.name: attendee for attendee in attendees}),
+                  mtime=mtime, by_key=MappingProxyType({key: attendees[i] for key, i in by_key.items()}),
+                  shared_emails=shared_emails)
+
+
+@dataclass(frozen=True)
+class RosterProblem:
+    line: int
+    severity: str
+    column: str
+    message: str
+
+
+def _clean(value):
+    value = " ".join((value or "").split())
+    return "" if value.lower() in _BLANKS else value
+
+
+def _fix_word_case(word, first):
+    # Only all-lowercase or ALL-CAPS words are touched, so "McDonald" or "DeLeon" are kept as typed
+    if not (word.islower() or word.isupper()) or _ROMAN.match(word) or len(word.strip(".")) == 1:
+        return word
+    if word.lower() in _PARTICLES and not first:
+        return word.lower()
+    return "".join(part.capitalize() for part in re.split(r"([-'])", word.lower()))
+
+
+def normalize_name(name):
+    return " ".join(_fix_word_case(word, i == 0) for i, word in enumerate(_clean(name).split()))
+
+
+def ingest_roster(path):
+    """Parse, validate and normalize a registration CSV.
+
+    Returns the Roster and a list of RosterProblem. Rows without a name are
+    dropped. A repeated name keeps its first row, as the old .iloc[0] lookup
+    did. Invalid emails are blanked. Emails shared by several attendees stay on
+    their rows but are left out of email lookups. Raises ValueError if the file
+    has no Name column.
+    """
+    mtime = os.path.getmtime(path)
+    problems = []
+    by_name = {}
+    seen_names = {}
+    email_owners = defaultdict(list)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        headers = {c.strip().lower(): c for c in reader.fieldnames or []}
+        if "name" not in headers:
+            raise ValueError(f"{path} has no Name column")
+        source = {col: headers.get(col.lower()) for col in COLUMNS}
+        for row in reader:
+            line = reader.line_num
+            if row.get(None):
+                problems.append(RosterProblem(line, WARNING, "", f"{len(row[None])} extra field(s) ignored"))
+            values = {col: _clean(row.get(source[col])) if source[col] else "" for col in COLUMNS}
+
+            name = normalize_name(values["Name"])
+            if not name:
+                if any(values.values()):
+                    problems.append(RosterProblem(line, ERROR, "Name", "No name; row skipped"))
+                continue
+            if name != values["Name"]:
+                problems.append(RosterProblem(line, FIXED, "Name", f"{values['Name']!r} -> {name!r}"))
+            key = normalize_key(name)
+            if key in seen_names:
+                problems.append(RosterProblem(line, WARNING, "Name",
+                                              f"{name!r} already registered on line {seen_names[key]}; row skipped"))
+                continue
+            seen_names[key] = line
+
+            email = values["Email"].lower()
+            if email and not _EMAIL.match(email):
+                problems.append(RosterProblem(line, WARNING, "Email", f"Invalid email {values['Email']!r} removed"))
+                email = ""
+            elif email != values["Email"]:
+                problems.append(RosterProblem(line, FIXED, "Email", f"{values['Email']!r} -> {email!r}"))
+            if email:
+                email_owners[email].append(line)
+
+            by_name[name] = Attendee(name=name, email=email, credentials=values["Credentials"],
+                                     membership_note=values["Membership Note"])
+
+    shared = {email: lines for email, lines in email_owners.items() if len(lines) > 1}
+    for email, lines in shared.items():
+        problems.append(RosterProblem(lines[0], WARNING, "Email",
+                                      f"{email} is shared by {len(lines)} attendees (lines "
+                                      f"{', '.join(map(str, lines))}); not used for email lookups"))
+    by_key = {}
+    for attendee in by_name.values():
+        by_key.setdefault(normalize_key(attendee.name), attendee)
+        if attendee.email and attendee.email not in shared:
+            by_key.setdefault(attendee.email, attendee)
+    problems.sort(key=lambda problem: problem.line)
+    roster = Roster(names=tuple(sorted(by_name)), by_name=MappingProxyType(by_name), mtime=mtime,
+                    by_key=MappingProxyType(by_key), shared_emails=frozenset(shared))
+    return roster, problems
+
+
+def load_roster(path):
+    return ingest_roster(path)[0]
@@ -0,0 +1,151 @@
+"""Validates a registration CSV and compiles it into a cache the app loads instead.
+
+    python roster_cache.py registration_list.csv            # report problems, write the cache
+    python roster_cache.py registration_list.csv --check    # report only
+
+The cache (registration_list.roster.pickle next to the CSV) holds the normalized
+roster with its lookup keys, the search index and the reconciliation join keys.
+It is rebuilt whenever the CSV's size or mtime no longer match. Exits with
+status 1 if any row had to be dropped.
+"""
+import argparse
+import gc
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from reconciliation import roster_keys
+from roster import ERROR, FIXED, WARNING, ingest_roster
+from roster_search import RosterSearch
+
+logger = logging.getLogger(__name__)
+
+# Bump when anything pickled below changes shape, so old caches are rebuilt instead of loaded
+CACHE_FORMAT = 2
+
+
+@dataclass
+class CompiledRoster:
+    roster: object
+    search: RosterSearch
+    keys: pd.DataFrame
+    problems: list
+    source_size: int
+    source_mtime_ns: int
+    format: int = CACHE_FORMAT
+    # Not part of the cache's identity: how this copy was obtained, for the organizer view
+    from_cache: bool = False
+    load_seconds: float = 0.0
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # The search index is pickled without its attendees; they are the roster's, in the same order
+        self.search.attendees = tuple(self.roster.by_name.values())
+
+
+def cache_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".roster.pickle"
+
+
+def compile_roster(csv_path):
+    started = time.perf_counter()
+    stat = os.stat(csv_path)
+    roster, problems = ingest_roster(csv_path)
+    return CompiledRoster(roster=roster, search=RosterSearch(roster.by_name.values()), keys=roster_keys(roster),
+                          problems=problems, source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns,
+                          load_seconds=time.perf_counter() - started)
+
+
+def write_cache(compiled, path):
+    # Written beside the target and renamed over it, so a reader never sees half a file
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False) as f:
+        pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, path)
+
+
+def read_cache(csv_path, path=None):
+    # The compiled roster if the cache matches the CSV as it is now, otherwise None
+    path = path or cache_path(csv_path)
+    started = time.perf_counter()
+    # Loading creates ~10 objects per attendee; collector passes over them mid-load only slow it down
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        stat = os.stat(csv_path)
+        with open(path, "rb") as f:
+            compiled = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Ignoring unreadable roster cache %s: %r", path, exc)
+        return None
+    finally:
+        if collecting:
+            gc.enable()
+    if (not isinstance(compiled, CompiledRoster) or compiled.format != CACHE_FORMAT
+            or (compiled.source_size, compiled.source_mtime_ns) != (stat.st_size, stat.st_mtime_ns)):
+        return None
+    compiled.from_cache = True
+    compiled.load_seconds = time.perf_counter() - started
+    return compiled
+
+
+def load_compiled_roster(csv_path, path=None, rebuild=False):
+    """The compiled roster for `csv_path`, from its cache when that is current.
+
+    Otherwise the CSV is ingested and the cache rewritten. Failing to write it
+    only costs the next start a re-ingest.
+    """
+    compiled = None if rebuild else read_cache(csv_path, path)
+    if compiled is None:
+        compiled = compile_roster(csv_path)
+        try:
+            write_cache(compiled, path or cache_path(csv_path))
+        except OSError as exc:
+            logger.warning("Could not write roster cache: %r", exc)
+    return compiled
+
+
+def problem_counts(problems):
+    counts = {ERROR: 0, WARNING: 0, FIXED: 0}
+    for problem in problems:
+        counts[problem.severity] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", nargs="?", default="registration_list.csv")
+    parser.add_argument("--cache", help="cache file to write (default: next to the CSV)")
+    parser.add_argument("--check", action="store_true", help="only report problems, don't write the cache")
+    args = parser.parse_args()
+
+    try:
+        compiled = compile_roster(args.csv) if args.check else load_compiled_roster(args.csv, args.cache, rebuild=True)
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    for problem in compiled.problems:
+        column = f" {problem.column}" if problem.column else ""
+        print(f"line {problem.line:>5}{column}: {problem.severity}: {problem.message}")
+    counts = problem_counts(compiled.problems)
+    print(f"{len(compiled.roster)} attendees; {counts[ERROR]} rows dropped, {counts[WARNING]} warnings, "
+          f"{counts[FIXED]} values normalized", file=sys.stderr)
+    if not args.check:
+        path = args.cache or cache_path(args.csv)
+        started = time.perf_counter()
+        read_cache(args.csv, path)
+        print(f"wrote {path} ({os.path.getsize(path) / 1024:.0f} KiB, loads in "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms)", file=sys.stderr)
+    return 1 if counts[ERROR] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
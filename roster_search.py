@@ -0,0 +1,167 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+
+from checkin_state import normalize_key
+
+_TOKEN_SPLIT = re.compile(r"[\s.,@_\-+']+")
+
+# Trigrams shared by more than this share of the roster (e.g. "exa", "com") say nothing about a misspelling
+# and would make the fallback O(roster); they are skipped once the roster is large enough for it to matter
+COMMON_GRAM_SHARE = 0.05
+COMMON_GRAM_MIN = 500
+
+
+def tokenize(value):
+    return [t for t in _TOKEN_SPLIT.split(normalize_key(value)) if t]
+
+
+def trigrams(value):
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    # Levenshtein distance, giving up once every cell in a row exceeds `limit`
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class RosterSearch:
+    """Server-side attendee lookup over name and email.
+
+    Prefix matches come from a sorted token array searched with bisect (a flat,
+    compact stand-in for a trie); misspellings fall back to trigram candidates
+    ranked by per-token edit distance. The fallback only runs when the query is
+    neither an exact name/email nor the prefix of enough entries to fill the
+    results, and ignores trigrams too common to narrow anything down.
+    """
+
+    def __init__(self, attendees):
+        self.attendees = tuple(attendees)
+        self._entry_tokens = []
+        grams = defaultdict(list)
+        pairs = []
+        for i, attendee in enumerate(self.attendees):
+            tokens = set(tokenize(attendee.name)) | set(tokenize(attendee.email))
+            email = normalize_key(attendee.email)
+            if email:
+                tokens.add(email)
+            self._entry_tokens.append(tuple(tokens))
+            pairs.extend((token, i) for token in tokens)
+            for gram in trigrams(normalize_key(attendee.name)) | trigrams(email):
+                grams[gram].append(i)
+        pairs.sort()
+        self._tokens = [token for token, _ in pairs]
+        self._token_ids = array("i", [i for _, i in pairs])
+        self._grams = {gram: array("i", ids) for gram, ids in grams.items()}
+        # Each entry's position in name order, so results are ranked without sorting every match
+        self._name_rank = array("i", [0] * len(self.attendees))
+        for rank, i in enumerate(sorted(range(len(self.attendees)), key=lambda i: self.attendees[i].name.lower())):
+            self._name_rank[i] = rank
+
+    def __getstate__(self):
+        # Attendees are left to the pickled Roster (see CompiledRoster); id arrays travel as raw bytes
+        return {"entry_tokens": self._entry_tokens, "tokens": self._tokens, "token_ids": self._token_ids.tobytes(),
+                "grams": {gram: ids.tobytes() for gram, ids in self._grams.items()},
+                "name_rank": self._name_rank.tobytes()}
+
+    def __setstate__(self, state):
+        self.attendees = ()
+        self._entry_tokens = state["entry_tokens"]
+        self._tokens = state["tokens"]
+        self._token_ids = array("i", state["token_ids"])
+        self._name_rank = array("i", state["name_rank"])
+        grams = self._grams = {}
+        for gram, ids in state["grams"].items():
+            grams[gram] = array("i")
+            grams[gram].frombytes(ids)
+
+    def _prefix_range(self, prefix):
+        start = bisect_left(self._tokens, prefix)
+        return start, bisect_left(self._tokens, prefix + "\uffff", start)
+
+    def _exact_matches(self, query_key, query_tokens):
+        # An exact name has every query word as a whole word, so only entries holding the rarest of them
+        # are compared; a whole email is itself one of the indexed words
+        if "@" in query_key:
+            word = query_key
+        else:
+            word = min(query_tokens, key=lambda t: bisect_right(self._tokens, t) - bisect_left(self._tokens, t))
+        ids = self._token_ids[bisect_left(self._tokens, word):bisect_right(self._tokens, word)]
+        return [i for i in set(ids) if query_key in (normalize_key(self.attendees[i].name),
+                                                      normalize_key(self.attendees[i].email))]
+
+    def _prefix_matches(self, query_key, query_tokens):
+        # A query with an "@" is an email being typed: it must prefix a whole address. Otherwise every
+        # query word must prefix some word of the name or email, rarest word first
+        if "@" in query_key:
+            start, end = self._prefix_range(query_key)
+            return set(self._token_ids[start:end])
+        ranges = sorted((end - start, start, end) for start, end in map(self._prefix_range, query_tokens))
+        matches = set(self._token_ids[ranges[0][1]:ranges[0][2]])
+        for _, start, end in ranges[1:]:
+            if not matches:
+                break
+            matches.intersection_update(self._token_ids[start:end])
+        return matches
+
+    def _distance(self, query_tokens, i, limit):
+        # Sum over query words of the closest word (or word prefix) of the entry, given up past `limit`
+        total = 0
+        for qt in query_tokens:
+            best = limit - total + 1
+            for t in self._entry_tokens[i]:
+                if not best:
+                    break
+                best = min(best, edit_distance(qt, t, best - 1))
+                if len(t) > len(qt):
+                    best = min(best, edit_distance(qt, t[:len(qt)], best - 1))
+            total += best
+            if total > limit:
+                break
+        return total
+
+    def _fallback_candidates(self, query_key, limit):
+        # Entries sharing the most trigrams with the query, and at least a third of them
+        cap = max(COMMON_GRAM_MIN, int(len(self.attendees) * COMMON_GRAM_SHARE))
+        postings = [ids for ids in map(self._grams.get, trigrams(query_key)) if ids and len(ids) <= cap]
+        shared = Counter(i for ids in postings for i in ids)
+        floor = max(1, len(postings) // 3)
+        return [i for i, count in shared.most_common(limit) if count >= floor]
+
+    def search(self, query, limit=10):
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        query_key = normalize_key(query)
+        by_name = self._name_rank.__getitem__
+        exact = sorted(self._exact_matches(query_key, query_tokens), key=by_name)
+
+        matches = self._prefix_matches(query_key, query_tokens)
+        found = exact + heapq.nsmallest(limit, matches.difference(exact), key=by_name)
+        if exact or len(found) >= limit:
+            return [self.attendees[i] for i in found[:limit]]
+
+        budget = max(1, len(query_key) // 4)
+        fuzzy = []
+        seen = set(found)
+        for i in self._fallback_candidates(query_key, limit * 5):
+            if i in seen:
+                continue
+            distance = self._distance(query_tokens, i, budget)
+            if distance <= budget:
+                fuzzy.append((distance, by_name(i), i))
+        found += [i for _, _, i in sorted(fuzzy)]
+        return [self.attendees[i] for i in found[:limit]]
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    errors: int = 0
+
+    def lookup(self, fn, *args):
+        # fn is expected to bump self.misses when it actually does the work (e.g. inside st.cache_resource)
+        misses = self.misses
+        value = fn(*args)
+        if self.misses == misses:
+            self.hits += 1
+        return value
+
+
+class TTLSnapshot:
+    """Process-wide copy of the check-in log, re-read at most once per `ttl` seconds.
+
+    When `refresh` is given, an expired value is brought up to date
+    incrementally. refresh(value) does the reading without the lock held and
+    returns apply(value) -> new value, which is run under the lock. get() starts
+    that on a background thread and keeps serving the current copy, so the
+    duplicate check in update() never waits on the network. Without `refresh`,
+    `loader` reloads the value from scratch under the lock. If a re-read fails,
+    the previous value keeps being served. Writes made by this process are
+    applied to the cached value with update().
+    """
+
+    def __init__(self, loader, ttl, refresh=None):
+        self.loader = loader
+        self.refresh_fn = refresh
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        # Held by whichever thread is re-reading; there is never more than one
+        self._refreshing = threading.Lock()
+        self._value = None
+        self._loaded_at = 0.0
+
+    def _load(self):
+        # Under self._lock: the first load, when there is no copy to serve meanwhile
+        try:
+            self.stats.misses += 1
+            self._value = self.loader()
+        except Exception as exc:
+            if self._value is None:
+                raise
+            self.stats.errors += 1
+            logger.warning("Log snapshot re-read failed, serving stale copy: %r", exc)
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        # Runs with self._refreshing held and self._lock free
+        try:
+            with self._lock:
+                value = self._value
+                self.stats.refreshes += 1
+            try:
+                apply = self.refresh_fn(value)
+            except Exception as exc:
+                # A throttled or failing re-read keeps serving the last good copy until the next TTL
+                apply = None
+                self.stats.errors += 1
+                logger.warning("Log snapshot re-read failed, serving stale copy: %r", exc)
+            with self._lock:
+                if apply is not None:
+                    self._value = apply(self._value)
+                self._loaded_at = time.monotonic()
+        finally:
+            self._refreshing.release()
+
+    def _expired(self):
+        return self._value is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def get(self):
+        with self._lock:
+            if self._value is None or (self._expired() and self.refresh_fn is None):
+                self._load()
+                return self._value
+            value = self._value
+            if not self._expired():
+                self.stats.hits += 1
+                return value
+        if self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh, name="log-snapshot-refresh", daemon=True).start()
+        return value
+
+    def refresh(self):
+        # Bring the value up to date now, regardless of the TTL, waiting for a refresh already running
+        if self.refresh_fn is None or self._value is None:
+            with self._lock:
+                self._load()
+                return self._value
+        self._refreshing.acquire()
+        self._refresh()
+        return self._value
+
+    def update(self, fn):
+        # Apply a local write to the cached value without a reload; the lock also makes a
+        # check-and-append in fn atomic with respect to other sessions in this process
+        with self._lock:
+            if self._value is None:
+                self._load()
+            return fn(self._value)
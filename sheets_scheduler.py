@@ -0,0 +1,192 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Lower number wins when callers compete for the same quota
+CHECKIN = 0
+REFRESH = 1
+
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+_WRITE_METHODS = {"update", "update_cell", "append_rows", "batch_update", "batch_clear", "delete_rows"}
+# Writes that change the sheet again if repeated, so they are only retried when surely not applied
+_UNREPEATABLE_METHODS = {"append_rows", "delete_rows"}
+
+
+class Throttled(Exception):
+    # Raised when a low-priority call gives up waiting for quota
+    code = 429
+
+
+def is_retryable(exc):
+    # gspread's APIError and FakeWorksheet's QuotaExceeded both carry the HTTP status as .code;
+    # requests' connection errors are OSErrors
+    return getattr(exc, "code", None) in RETRYABLE_CODES or isinstance(exc, OSError)
+
+
+def may_have_applied(exc):
+    # A 429 is refused before the call runs; a timeout, dropped connection or 5xx may come after it landed
+    return is_retryable(exc) and getattr(exc, "code", None) != 429
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1, per_minute // 6)
+        self.tokens = float(self.capacity)
+        self._last = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_take(self, now):
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now):
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SheetsScheduler:
+    """Central gate for every Sheets API call made by this process.
+
+    Reads and writes draw from separate token buckets sized to the per-minute
+    quota share of this process. Waiters on the same bucket are served in
+    priority order (check-in traffic before organizer refreshes), identical reads
+    already in flight at the same or a higher priority are joined instead of
+    re-issued, and 429/5xx responses to check-in traffic are retried with
+    full-jitter exponential backoff. Refreshes fail on the first such error
+    instead: their caller has a stale copy to serve.
+    So does an append that may have reached the sheet anyway (see
+    may_have_applied); AppendWriter finds out on its next catch-up.
+    """
+
+    def __init__(self, reads_per_minute=60, writes_per_minute=60, max_retries=5, base_delay=1.0,
+                 max_delay=32.0, refresh_max_wait=2.0, metrics=None):
+        self.buckets = {"read": TokenBucket(reads_per_minute), "write": TokenBucket(writes_per_minute)}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.refresh_max_wait = refresh_max_wait
+        self.metrics = metrics
+        self._cond = threading.Condition()
+        self._waiting = {"read": [], "write": []}
+        self._seq = itertools.count()
+        self._inflight = {}
+
+    def _count(self, name):
+        if self.metrics is not None:
+            self.metrics.count(name)
+
+    def _acquire(self, kind, priority):
+        max_wait = self.refresh_max_wait if priority > CHECKIN else None
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        bucket, queue = self.buckets[kind], self._waiting[kind]
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(queue, ticket)
+            waited = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    if queue[0] == ticket and bucket.try_take(now):
+                        return
+                    if deadline is not None and now >= deadline:
+                        self._count("sheets.throttled_refreshes")
+                        raise Throttled(f"No {kind} quota within {max_wait:.1f}s")
+                    waited = True
+                    timeout = bucket.wait_time(now) if queue[0] == ticket else 0.05
+                    if deadline is not None:
+                        timeout = min(timeout, deadline - now)
+                    self._cond.wait(max(timeout, 0.001))
+            finally:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self._cond.notify_all()
+                if waited:
+                    self._count(f"sheets.{kind}_waits")
+
+    def _run(self, kind, priority, fn, args, kwargs, repeatable=True):
+        attempt = 0
+        while True:
+            self._acquire(kind, priority)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                if not is_retryable(exc) or priority > CHECKIN or attempt >= self.max_retries or \
+                        (not repeatable and may_have_applied(exc)):
+                    if priority > CHECKIN and is_retryable(exc):
+                        self._count("sheets.failed_refreshes")
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                self._count("sheets.retries")
+                logger.warning("Sheets call %s failed (%r), retry %d in %.1fs",
+                               getattr(fn, "__name__", fn), exc, attempt, delay)
+                time.sleep(delay)
+
+    def call(self, method, priority, fn, *args, **kwargs):
+        kind = "write" if method in _WRITE_METHODS else "read"
+        if kind == "write":
+            return self._run(kind, priority, fn, args, kwargs, repeatable=method not in _UNREPEATABLE_METHODS)
+
+        # Join an identical read that is already on the wire, unless it was sent at a lower priority: its
+        # quota wait and retries would then apply to this call too
+        request = (method, repr(args), repr(sorted(kwargs.items())))
+        key = request + (priority,)
+        with self._cond:
+            flight = next((self._inflight[request + (p,)] for p in range(CHECKIN, priority + 1)
+                           if request + (p,) in self._inflight), None)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+        if not leader:
+            self._count("sheets.merged_reads")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = self._run(kind, priority, fn, args, kwargs)
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+
+class ScheduledWorksheet:
+    # A worksheet view whose API calls all go through `scheduler` at a fixed priority
+    def __init__(self, worksheet, scheduler, priority):
+        self._worksheet = worksheet
+        self._scheduler = scheduler
+        self._priority = priority
+
+    def __getattr__(self, name):
+        attr = getattr(self._worksheet, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._scheduler.call(name, self._priority, attr, *args, **kwargs)
+        return call
@@ -0,0 +1,200 @@
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from checkin_state import DUPLICATE_STATUS, DuplicateIndex, column_letter, normalize_key
+from sheets_scheduler import may_have_applied
+
+logger = logging.getLogger(__name__)
+
+
+# Size and shape of one append_rows call
+@dataclass(frozen=True)
+class WriteStats:
+    rows: int
+    bytes: int
+    seconds: float
+    duplicates: int = 0
+    # One flag per entry passed to write(): False if the log already had that person and it was dropped
+    written: tuple = ()
+
+
+_UPDATED_ROW = re.compile(r"![A-Z]+(\d+)")
+
+
+class AppendWriter:
+    """Appends check-in rows to the worksheet instead of re-uploading the whole log.
+
+    Batching is up to the caller: JournalFlusher sends everything pending as one
+    write(), so check-ins from several kiosk sessions share one append_rows call.
+
+    Other processes may append to the same sheet, so every write first catches up on
+    rows added since the last known row count and drops entries they already cover
+    (if the known rows themselves changed, e.g. an organizer deleted one, the sheet
+    is read again in full). If another writer slips rows in between that check and
+    the append, the later copy of a person in sheet order is marked with
+    DUPLICATE_STATUS. Either way the entry is reported as not written in the
+    returned WriteStats.
+
+    An append that fails in a way that may still have reached the sheet (a
+    timeout or 5xx) is not repeated blindly: the next catch-up looks for those
+    rows, and entries found there are reported as written without appending
+    them again.
+    """
+
+    def __init__(self, worksheet, columns):
+        self.worksheet = worksheet
+        self.columns = list(columns)
+        self._write_lock = threading.Lock()
+        self._sheet_columns = None
+        self._known_rows = None
+        self._known_last = None
+        self._seen = DuplicateIndex()
+        # Entries of an append that may have landed, and what became of them once looked for
+        self._in_doubt = []
+        self._landed = {}
+
+    def _row_keys(self, rows):
+        name_col, email_col = self._sheet_columns.index("Name"), self._sheet_columns.index("Email")
+        for row in rows:
+            yield (row[name_col] if len(row) > name_col else "", row[email_col] if len(row) > email_col else "")
+
+    def _merge_rows(self, rows):
+        for name, email in self._row_keys(rows):
+            self._seen.add(name, email)
+
+    @staticmethod
+    def _entry_key(entry):
+        return normalize_key(entry["Name"]), normalize_key(entry["Email"])
+
+    def _last_key(self, rows):
+        # Normalized name/email of the last row, to spot the known rows being edited or removed
+        keys = list(self._row_keys(rows[-1:]))
+        return tuple(map(normalize_key, keys[0])) if keys else None
+
+    def take_over(self, previous):
+        # A writer replacing `previous` (e.g. after reconnecting) still looks for its doubtful append
+        self._in_doubt = previous._in_doubt + self._in_doubt
+
+    def _settle(self, first, rows):
+        # Look for the doubtful batch among rows first..first+len(rows)-1, just read. Its entries are
+        # written if found, unless another writer's copy of the person came before it
+        entries, self._in_doubt = self._in_doubt, []
+        keys = [self._entry_key(entry) for entry in entries]
+        found = [tuple(map(normalize_key, key)) for key in self._row_keys(rows)]
+        for i in range(len(found) - len(keys) + 1):
+            if found[i:i + len(keys)] == keys:
+                break
+        else:
+            return
+        earlier = DuplicateIndex()
+        for name, email in self._row_keys(rows[:i]):
+            earlier.add(name, email)
+        status_col = self._sheet_columns.index("Status") + 1
+        for offset, entry in enumerate(entries):
+            duplicate = earlier.seen(entry["Name"], entry["Email"])
+            if duplicate:
+                self.worksheet.update_cell(first + i + offset, status_col, DUPLICATE_STATUS)
+            self._landed[keys[offset]] = not duplicate
+        logger.info("%d row(s) of a failed append_rows had reached the sheet at row %d", len(entries), first + i)
+
+    def _load(self):
+        values = self.worksheet.get_all_values()
+        header = [h for h in (values[0] if values else []) if h]
+        missing = [c for c in self.columns if c not in header]
+        if missing:
+            header = header + missing
+            self.worksheet.update([header], "A1")
+        self._sheet_columns = header
+        if self._in_doubt:
+            self._settle(2, values[1:])
+        self._seen = DuplicateIndex()
+        self._merge_rows(values[1:])
+        self._known_rows = max(len(values), 1)
+        self._known_last = self._last_key(values[1:])
+
+    def _catch_up(self):
+        # First call reads the whole sheet; later calls only fetch rows other writers added, along
+        # with the header and last known row. If either changed (rows deleted or re-sorted, columns
+        # edited), the sheet is read again in full, as refresh_log_state does
+        if self._known_rows is None:
+            return self._load()
+        last = column_letter(len(self._sheet_columns))
+        n = self._known_rows
+        header, tail, rows = self.worksheet.batch_get([f"A1:{last}1", f"A{n}:{last}{n}", f"A{n + 1}:{last}"])
+        if [h for h in (header[0] if header else []) if h] != self._sheet_columns or \
+                (n > 1 and self._last_key(tail) != self._known_last):
+            logger.info("Check-in sheet was edited above row %d; re-reading it", n + 1)
+            return self._load()
+        if self._in_doubt:
+            self._settle(n + 1, rows)
+        if rows:
+            logger.info("Merged %d row(s) appended by other writers", len(rows))
+            self._merge_rows(rows)
+            self._known_rows += len(rows)
+            self._known_last = self._last_key(rows)
+
+    def _resolve_duplicates(self, start, entries):
+        # Rows between our last known row and our own were appended concurrently by others.
+        # Returns the offsets (into entries) of our rows marked as duplicates of theirs
+        marked = set()
+        if start > self._known_rows + 1:
+            columns = self._sheet_columns
+            gap = self.worksheet.get(f"A{self._known_rows + 1}:{column_letter(len(columns))}{start - 1}")
+            earlier = DuplicateIndex()
+            for name, email in self._row_keys(gap):
+                earlier.add(name, email)
+            status_col = columns.index("Status") + 1
+            for offset, entry in enumerate(entries):
+                if earlier.seen(entry["Name"], entry["Email"]):
+                    self.worksheet.update_cell(start + offset, status_col, DUPLICATE_STATUS)
+                    marked.add(offset)
+            self._merge_rows(gap)
+        self._known_rows = start + len(entries) - 1
+        self._known_last = self._entry_key(entries[-1])
+        return marked
+
+    def write(self, entries):
+        # Send the given entries in one append_rows call
+        with self._write_lock:
+            self._catch_up()
+            landed, self._landed = self._landed, {}
+            written = [False] * len(entries)
+            fresh, positions = [], []
+            for position, entry in enumerate(entries):
+                if self._entry_key(entry) in landed:
+                    written[position] = landed.pop(self._entry_key(entry))
+                    continue
+                if self._seen.seen(entry["Name"], entry["Email"]):
+                    continue
+                self._seen.add(entry["Name"], entry["Email"])
+                fresh.append(entry)
+                positions.append(position)
+
+            columns = self._sheet_columns
+            values = [[entry.get(col, "") for col in columns] for entry in fresh]
+            payload = len(json.dumps({"values": values}).encode("utf-8")) if values else 0
+            started = time.perf_counter()
+            marked = set()
+            if values:
+                try:
+                    response = self.worksheet.append_rows(values, value_input_option="USER_ENTERED",
+                                                          table_range="A1")
+                except Exception as exc:
+                    for entry in fresh:
+                        self._seen.discard(entry["Name"], entry["Email"])
+                    if may_have_applied(exc):
+                        self._in_doubt = fresh
+                    raise
+                start = int(_UPDATED_ROW.search(response["updates"]["updatedRange"]).group(1))
+                marked = self._resolve_duplicates(start, fresh)
+            for offset, position in enumerate(positions):
+                written[position] = offset not in marked
+            stats = WriteStats(rows=len(values), bytes=payload, seconds=time.perf_counter() - started,
+                               duplicates=written.count(False), written=tuple(written))
+        logger.info("append_rows sent %d row(s), %d bytes in %.3fs (%d duplicate(s) merged)",
+                    stats.rows, stats.bytes, stats.seconds, stats.duplicates)
+        return stats
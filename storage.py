@@ -0,0 +1,375 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from checkin_state import CheckinLogState, load_log_state, normalize_key, refresh_log_state, reload_log_state
+from fake_worksheet import FakeWorksheet
+from instrumentation import InstrumentedWorksheet
+from sheets_scheduler import CHECKIN, REFRESH, RETRYABLE_CODES, ScheduledWorksheet
+from sheets_writer import AppendWriter, WriteStats
+
+logger = logging.getLogger(__name__)
+
+
+class OfflineError(ConnectionError):
+    # Raised by writes while the remote log can't be reached; the journal keeps the entries pending
+    pass
+
+
+class CheckinBackend:
+    """Where the check-in log lives.
+
+    The app only talks to a backend: load_log builds the shared CheckinLogState,
+    refresh_log reads what changed since and returns a function that applies it
+    to the state (called under the snapshot lock, so it must not touch the
+    network), and write appends check-ins (and is what JournalFlusher calls).
+    Duplicate checks and exports work from that state, never the store.
+    """
+
+    name = "backend"
+    online = True
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.last_write = None
+        self.total_calls = 0
+        self.total_rows = 0
+        self.total_bytes = 0
+
+    def _record(self, stats):
+        self.last_write = stats
+        self.total_calls += bool(stats.rows)
+        self.total_rows += stats.rows
+        self.total_bytes += stats.bytes
+        return stats
+
+    def instrument(self, metrics):
+        # Backends with a remote API time each call through `metrics`
+        return self
+
+    def take_over(self, previous):
+        # Called on a backend that replaces `previous` after an outage, to carry over unfinished write state
+        pass
+
+    def load_log(self, journal=None):
+        raise NotImplementedError
+
+    def refresh_log(self, state, journal=None):
+        return reload_log_state(state, lambda: self.load_log(journal))
+
+    def write(self, entries):
+        raise NotImplementedError
+
+
+class SheetsBackend(CheckinBackend):
+    # The Google Sheets worksheet (or anything that quacks like one) as the system of record
+    name = "sheets"
+
+    def __init__(self, worksheet, columns, scheduler=None):
+        super().__init__(columns)
+        self.scheduler = scheduler
+        self.writer = AppendWriter(worksheet, columns)
+        self._wire(worksheet)
+
+    def _wire(self, worksheet):
+        # Check-in writes outrank log loads/refreshes when both wait on the scheduler
+        self.raw_worksheet = worksheet
+        if self.scheduler is None:
+            self.worksheet = self.writer.worksheet = worksheet
+        else:
+            self.worksheet = ScheduledWorksheet(worksheet, self.scheduler, REFRESH)
+            self.writer.worksheet = ScheduledWorksheet(worksheet, self.scheduler, CHECKIN)
+
+    def instrument(self, metrics):
+        self._wire(InstrumentedWorksheet(self.raw_worksheet, metrics))
+        return self
+
+    def take_over(self, previous):
+        if isinstance(previous, SheetsBackend):
+            self.writer.take_over(previous.writer)
+
+    def load_log(self, journal=None):
+        return load_log_state(self.worksheet, self.columns, journal)
+
+    def refresh_log(self, state, journal=None):
+        return refresh_log_state(state, self.worksheet, self.columns, journal)
+
+    def write(self, entries):
+        return self._record(self.writer.write(entries))
+
+
+class FakeSheetsBackend(SheetsBackend):
+    # Sheets code path against an in-memory worksheet with simulated latency and per-minute quotas
+    name = "fake"
+
+    def __init__(self, columns, latency=0.0, read_quota=None, write_quota=None, rows=None, scheduler=None):
+        worksheet = FakeWorksheet(rows or [list(columns)], latency=latency,
+                                  read_quota=read_quota, write_quota=write_quota)
+        super().__init__(worksheet, columns, scheduler=scheduler)
+
+
+class SQLiteBackend(CheckinBackend):
+    """Local SQLite log for high-volume or offline events.
+
+    Normalized name/email keys carry unique indexes, so a duplicate insert is
+    rejected by the database itself even with several processes writing.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, columns):
+        super().__init__(columns)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkins ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " name_key TEXT,"
+            " email_key TEXT,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS checkins_name ON checkins (name_key)")
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS checkins_email ON checkins (email_key)")
+
+    @staticmethod
+    def _key(value):
+        # Empty keys are stored as NULL so they never collide
+        return normalize_key(value) or None
+
+    def _rows(self, after=0):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, payload FROM checkins WHERE id > ? ORDER BY id", (after,)
+            ).fetchall()
+
+    def load_log(self, journal=None):
+        # Journal before the table, as in load_log_state
+        pending = journal.pending_entries() if journal is not None else []
+        rows = self._rows()
+        state = CheckinLogState([json.loads(payload) for _, payload in rows], columns=self.columns,
+                                header=self.columns, sheet_rows=rows[-1][0] if rows else 0)
+        state.add_local(pending)
+        return state
+
+    def refresh_log(self, state, journal=None):
+        # sheet_rows doubles as the highest row id merged so far
+        rows = self._rows(state.sheet_rows)
+
+        def apply(current):
+            if rows:
+                current.extend([json.loads(payload) for _, payload in rows])
+                current.sheet_rows = rows[-1][0]
+            return current
+        return apply
+
+    def write(self, entries):
+        values = [(self._key(e["Name"]), self._key(e["Email"]),
+                   json.dumps({col: e.get(col, "") for col in self.columns})) for e in entries]
+        started = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # One statement per row, so each entry's outcome is known
+                written = tuple(self._conn.execute(
+                    "INSERT OR IGNORE INTO checkins (name_key, email_key, payload) VALUES (?, ?, ?)", value
+                ).rowcount == 1 for value in values)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        payload = sum(len(v[2]) for v in values)
+        return self._record(WriteStats(rows=sum(written), bytes=payload, seconds=time.perf_counter() - started,
+                                       duplicates=written.count(False), written=written))
+
+
+class LogMirror:
+    """Local copy of the check-in log last read from a remote backend.
+
+    Rows are kept in log order as read, including ones that share a name or
+    email, so offline totals match the sheet. sync() only writes rows the file
+    doesn't already have at the same position.
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS log_rows (position INTEGER PRIMARY KEY, payload TEXT NOT NULL)")
+
+    def _payload(self, entry):
+        return json.dumps({col: entry.get(col, "") for col in self.columns})
+
+    def _stored(self, position):
+        row = self._conn.execute("SELECT payload FROM log_rows WHERE position = ?", (position,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, log):
+        # Rows stay as long as the log still has them at the same position. After a reload that changed
+        # earlier rows (deleted or re-sorted on the sheet), everything from the first difference is rewritten
+        with self._lock:
+            count = self._conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM log_rows").fetchone()[0]
+            keep = min(count, len(log))
+            if keep and self._stored(keep - 1) != self._payload(log.row(keep - 1)):
+                low, high = 0, keep - 1
+                while low < high:
+                    middle = (low + high) // 2
+                    if self._stored(middle) == self._payload(log.row(middle)):
+                        low = middle + 1
+                    else:
+                        high = middle
+                keep = low
+            rows = [(keep + i, self._payload(entry)) for i, entry in enumerate(log.records(keep))]
+            if keep == count and not rows:
+                return 0
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM log_rows WHERE position >= ?", (keep,))
+                self._conn.executemany("INSERT INTO log_rows (position, payload) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def load_log(self, journal=None):
+        pending = journal.pending_entries() if journal is not None else []
+        with self._lock:
+            rows = self._conn.execute("SELECT payload FROM log_rows ORDER BY position").fetchall()
+        state = CheckinLogState([json.loads(payload) for payload, in rows], columns=self.columns,
+                                header=self.columns)
+        state.add_local(pending)
+        return state
+
+
+class FailoverBackend(CheckinBackend):
+    """A remote backend that falls back to a local mirror when it can't be reached.
+
+    `connect` opens the remote backend (e.g. a SheetsBackend) and is retried at
+    most every `retry_interval` seconds. A connection error or 5xx from a
+    remote read or write also drops the remote until then, so a connection
+    lost mid-event takes the app offline too. The log the remote serves is
+    copied into `mirror` (a LogMirror) at the start of each refresh, outside the
+    snapshot lock, and while offline the log is loaded from the mirror plus the
+    journal's pending check-ins. Writes raise OfflineError until the remote is
+    back, which leaves the entries in the journal; JournalFlusher's retries then
+    send them in bulk, and AppendWriter drops (and reports as not written) any
+    the sheet already has.
+    """
+
+    def __init__(self, connect, mirror, retry_interval=30.0):
+        super().__init__(mirror.columns)
+        self._connect = connect
+        self.mirror = mirror
+        self.retry_interval = retry_interval
+        self.remote = None
+        # The remote dropped on the last outage, handed to the next one (see CheckinBackend.take_over)
+        self._dropped = None
+        self.last_error = None
+        self._metrics = None
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.remote.name if self.remote is not None else "offline"
+
+    @property
+    def online(self):
+        return self.remote is not None
+
+    def instrument(self, metrics):
+        self._metrics = metrics
+        return self
+
+    def connect(self):
+        # Returns the remote backend, trying to (re)connect if the retry interval has passed
+        with self._lock:
+            if self.remote is None and time.monotonic() >= self._next_attempt:
+                try:
+                    remote = self._connect()
+                except Exception as exc:
+                    self._went_offline(exc, "offline.connect_failures")
+                else:
+                    self.remote = remote.instrument(self._metrics) if self._metrics is not None else remote
+                    if self._dropped is not None:
+                        self.remote.take_over(self._dropped)
+                        self._dropped = None
+                    self.last_error = None
+                    logger.info("Connected to the %s backend", self.remote.name)
+            return self.remote
+
+    def _went_offline(self, exc, counter):
+        self.last_error = repr(exc)
+        self._next_attempt = time.monotonic() + self.retry_interval
+        if self._metrics is not None:
+            self._metrics.count(counter)
+        logger.warning("Check-in backend unreachable, working offline: %r", exc)
+
+    def _lost(self, remote, exc):
+        # True (and offline until the next retry) if exc means the remote can't be reached: a connection
+        # error or 5xx. A 429 only means the quota ran out; the caller serves its stale copy meanwhile
+        code = getattr(exc, "code", None)
+        if not (isinstance(exc, OSError) or (code in RETRYABLE_CODES and code != 429)):
+            return False
+        with self._lock:
+            if self.remote is remote:
+                self.remote, self._dropped = None, remote
+                self._went_offline(exc, "offline.remote_errors")
+        return True
+
+    def _offline_state(self, journal):
+        state = self.mirror.load_log(journal)
+        # No sheet position: the first refresh after reconnecting does a full load
+        state.offline = True
+        return state
+
+    def load_log(self, journal=None):
+        remote = self.connect()
+        if remote is not None:
+            try:
+                state = remote.load_log(journal)
+            except Exception as exc:
+                self._lost(remote, exc)
+                logger.warning("Loading the log from %s failed, using the local mirror: %r", remote.name, exc)
+            else:
+                return state
+        return self._offline_state(journal)
+
+    def _sync_mirror(self, state):
+        try:
+            self.mirror.sync(state.log)
+        except sqlite3.Error as exc:
+            logger.warning("Could not update the local log mirror: %r", exc)
+
+    def refresh_log(self, state, journal=None):
+        remote = self.connect()
+        if state.offline:
+            if remote is None:
+                return lambda current: current
+            return reload_log_state(state, lambda: self.load_log(journal))
+        # Mirror what the last load or refresh brought in; refreshes run off the snapshot lock
+        self._sync_mirror(state)
+        if remote is None:
+            return reload_log_state(state, lambda: self._offline_state(journal))
+        try:
+            return remote.refresh_log(state, journal)
+        except Exception as exc:
+            if not self._lost(remote, exc):
+                raise
+            return reload_log_state(state, lambda: self._offline_state(journal))
+
+    def write(self, entries):
+        remote = self.connect()
+        if remote is None:
+            raise OfflineError(f"offline since the last connection attempt: {self.last_error}")
+        try:
+            return self._record(remote.write(entries))
+        except Exception as exc:
+            self._lost(remote, exc)
+            raise
@@ -0,0 +1,145 @@
+"""Simulates several kiosk processes checking people in against one shared sheet.
+
+Each simulated kiosk has its own journal, writer, flusher and log snapshot, exactly
+like a separate Streamlit process; its sessions are threads. Attendees are offered
+to every kiosk so the same person is tried at several devices at once.
+
+    python stress_test_kiosks.py --kiosks 4 --sessions 3 --attendees 300
+
+Every check-in a kiosk accepted must end up confirmed or rejected in its journal.
+Exits non-zero if one is still pending, a confirmed one is missing from the
+sheet, one was rejected although no other kiosk's live row has that person, or
+a person appears more than once (ignoring rows marked as duplicates).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from checkin_journal import CONFIRMED, REJECTED, CheckinJournal, JournalFlusher
+from checkin_state import DUPLICATE_STATUS, normalize_key, record_checkin
+from fake_worksheet import FakeWorksheet
+from sheets_cache import TTLSnapshot
+from storage import SheetsBackend
+
+LOG_COLUMNS = ['Timestamp', 'Name', 'Email', 'Credentials', 'Status', 'Membership Status',
+               'Interested in Membership', 'Affiliation']
+
+
+class Kiosk:
+    def __init__(self, number, worksheet, directory, ttl):
+        self.journal = CheckinJournal(os.path.join(directory, f"kiosk{number}.sqlite3"))
+        self.backend = SheetsBackend(worksheet, LOG_COLUMNS)
+        self.flusher = JournalFlusher(self.journal, self.backend, window=0.01, base_delay=0.01).start()
+        self.snapshot = TTLSnapshot(lambda: self.backend.load_log(self.journal), ttl=ttl,
+                                    refresh=lambda state: self.backend.refresh_log(state, self.journal))
+        self.accepted = []
+        self._lock = threading.Lock()
+
+    def check_in(self, attendee):
+        entry = dict.fromkeys(LOG_COLUMNS, "")
+        entry.update(Timestamp=time.strftime("%Y-%m-%d %H:%M:%S"), Name=attendee[0], Email=attendee[1],
+                     Status="Preregistered", **{"Membership Status": "Yes"})
+        self.snapshot.get()
+        journal_id = self.snapshot.update(lambda state: record_checkin(state, entry, self.journal))
+        if journal_id:
+            self.flusher.notify()
+            with self._lock:
+                self.accepted.append((journal_id, entry))
+
+    def drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self.journal.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.flusher.stop(timeout=1)
+
+
+def run(kiosks, sessions, attendees, latency, ttl, seed):
+    rng = random.Random(seed)
+    people = [(f"Attendee {i}", f"attendee{i}@example.org") for i in range(attendees)]
+    worksheet = FakeWorksheet([LOG_COLUMNS], latency=latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        fleet = [Kiosk(n, worksheet, directory, ttl) for n in range(kiosks)]
+
+        def session(kiosk, queue):
+            for attendee in queue:
+                kiosk.check_in(attendee)
+
+        threads = []
+        for kiosk in fleet:
+            for _ in range(sessions):
+                queue = people[:]
+                rng.shuffle(queue)
+                threads.append(threading.Thread(target=session, args=(kiosk, queue[:attendees // 2 + 1])))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for kiosk in fleet:
+            kiosk.drain(timeout=30)
+        elapsed = time.perf_counter() - started
+        # (kiosk number, email, final journal status) for every accepted check-in
+        outcomes = []
+        for number, kiosk in enumerate(fleet):
+            statuses = kiosk.journal.statuses([journal_id for journal_id, _ in kiosk.accepted])
+            outcomes += [(number, normalize_key(entry["Email"]), statuses.get(journal_id))
+                         for journal_id, entry in kiosk.accepted]
+            kiosk.journal.close()
+
+    header, rows = worksheet.rows[0], worksheet.rows[1:]
+    email_col, status_col = header.index("Email"), header.index("Status")
+    live = [row for row in rows if row[status_col] != DUPLICATE_STATUS]
+    on_sheet = Counter(normalize_key(row[email_col]) for row in live)
+    confirmed_by = {}
+    for number, email, status in outcomes:
+        if status == CONFIRMED:
+            confirmed_by.setdefault(email, []).append(number)
+
+    unsettled = [email for _, email, status in outcomes if status not in (CONFIRMED, REJECTED)]
+    rejected = [(number, email) for number, email, status in outcomes if status == REJECTED]
+    # A rejection is only right if another kiosk's copy of that person made it onto the sheet
+    wrongly_rejected = [email for number, email in rejected
+                        if email not in on_sheet or set(confirmed_by.get(email, ())) <= {number}]
+    lost = set(confirmed_by) - set(on_sheet)
+    duplicated = {email: count for email, count in on_sheet.items() if count > 1}
+    confirmed_twice = {email: kiosks for email, kiosks in confirmed_by.items() if len(kiosks) > 1}
+    print(f"{kiosks} kiosks x {sessions} sessions, {attendees} attendees: {len(live)} check-ins, "
+          f"{len(rows) - len(live)} marked duplicate, {len(outcomes)} accepted, {len(rejected)} of them "
+          f"rejected by the writer, {elapsed:.2f}s, sheet calls {dict(worksheet.calls)}")
+    if unsettled:
+        print(f"UNSETTLED {len(unsettled)} check-in(s) neither confirmed nor rejected: {sorted(unsettled)[:5]}")
+    if lost:
+        print(f"LOST {len(lost)} check-in(s): {sorted(lost)[:5]}")
+    if wrongly_rejected:
+        print(f"WRONGLY REJECTED {len(wrongly_rejected)} check-in(s): {sorted(wrongly_rejected)[:5]}")
+    if duplicated:
+        print(f"DUPLICATED {len(duplicated)} attendee(s): {sorted(duplicated)[:5]}")
+    if confirmed_twice:
+        print(f"CONFIRMED TWICE {len(confirmed_twice)} attendee(s): {sorted(confirmed_twice)[:5]}")
+    return not (unsettled or lost or wrongly_rejected or duplicated or confirmed_twice)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kiosks", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--attendees", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds slept per fake API call")
+    parser.add_argument("--ttl", type=float, default=0.5, help="log snapshot TTL per kiosk")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+
+    ok = all(run(args.kiosks, args.sessions, args.attendees, args.latency, args.ttl, args.seed + r)
+             for r in range(args.rounds))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()